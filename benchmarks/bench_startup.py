@@ -0,0 +1,72 @@
+# bench_startup.py - Tracks the startup time of the analysis package and its CLI.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_startup.py [--repeat N]
+
+# Import standard libraries.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Directory containing the analysis package.
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Commands to time, each run in a fresh interpreter.
+CASES = {
+    "python (baseline)": ["-c", "pass"],
+    "import validate, formatter": ["-c", "import analysis.utils.validate, analysis.utils.formatter"],
+    "import country": ["-c", "import analysis.analyser.country"],
+    "import pandas": ["-c", "import pandas"],
+    "python -m analysis --help": ["-m", "analysis", "--help"],
+}
+
+# Modules that must stay unloaded for lightweight imports.
+HEAVY = ["pandas", "numpy"]
+
+
+def time_command(args, repeat):
+    """Run a Python command repeatedly and return its wall-clock times.
+
+    :param args: list[str], interpreter arguments.
+    :param repeat: int, number of runs.
+    :return: list[float], seconds per run.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=SRC, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def heavy_modules(statement):
+    """List heavy modules loaded by a statement.
+
+    :param statement: str, Python statement to run.
+    :return: list[str] of loaded heavy module names.
+    """
+    check = f"{statement}; import sys; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", check], cwd=SRC, check=True, capture_output=True, text=True)
+    return [m for m in output.stdout.strip().split(",") if m]
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description="Benchmark analysis package startup.")
+    arguments.add_argument("--repeat", type=int, default=10, help="runs per command")
+    args = arguments.parse_args(argv)
+
+    print(f"{'command':<32}{'median':>10}{'min':>10}")
+    for name, command in CASES.items():
+        times = time_command(command, args.repeat)
+        print(f"{name:<32}{statistics.median(times) * 1000:>8.1f}ms{min(times) * 1000:>8.1f}ms")
+
+    loaded = heavy_modules("import analysis.utils.validate, analysis.utils.formatter, analysis.analyser.country")
+    print(f"\nheavy modules loaded by lightweight imports: {', '.join(loaded) or 'none'}")
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
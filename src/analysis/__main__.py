@@ -0,0 +1,9 @@
+# analysis/__main__.py - Entry point for `python -m analysis`.
+
+# Record the start time before anything else is imported.
+import time
+_started = time.perf_counter()
+
+from .cli import main
+
+main(started=_started)
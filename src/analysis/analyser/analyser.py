@@ -2,13 +2,14 @@
 
 # Import project custom modules and Classes.
 from ..utils import validate
+from ..utils.lazy import lazy_import
 
 # Import standard library for parsing aids.
 from enum import Enum
 
-# Import third-party libraries.
-import numpy as np
-import pandas as pd
+# Import third-party libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 
 class QueryMode(Enum):
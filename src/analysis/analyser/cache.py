@@ -0,0 +1,496 @@
+# cache.py - Contains a content-addressed result cache for analyser computations.
+
+# Import project custom modules and Classes.
+from ..analyser import analyser
+from ..utils.lazy import lazy_import
+
+# Import standard libraries.
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from enum import Enum
+
+# Import third-party libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Default in-memory budget for cached results, in bytes.
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Groupby options that change the result of a grouped computation.
+_GROUPBY_OPTIONS = ("as_index", "sort", "group_keys", "dropna", "observed")
+
+# Fingerprints of frames registered with remember_frame, keyed by id(). Entries are dropped with their frame.
+_remembered = {}
+
+
+def fingerprint_frame(df, sample=None, columns=None):
+    """Compute a content fingerprint for a pd.DataFrame, pd.Series or groupby object.
+
+    Shape, dtypes and labels are always part of the fingerprint. Frames registered with
+    remember_frame return their stored fingerprint without hashing.
+
+    :param df: pd.DataFrame, pd.Series, DataFrameGroupBy or SeriesGroupBy to fingerprint.
+    :param sample: int, number of evenly spaced rows to hash. Hashes every row if None, defaults to None
+    :param columns: list of column labels whose values are hashed. Hashes every column if None, defaults to None
+    :return: str, hex digest identifying the shape, dtypes, labels and values of the input.
+    """
+    digest = hashlib.sha1()
+
+    # Grouped frames are identified by their underlying object, grouping keys and every option that changes the output.
+    if isinstance(df, pd.core.groupby.GroupBy):
+        keys = getattr(df, "keys", None)
+        digest.update(repr((
+            type(df).__name__,
+            _fingerprint_value(keys),
+            _fingerprint_value(getattr(df, "level", None)),
+            _fingerprint_value(getattr(df, "_selection", None)),
+            [(option, getattr(df, option, None)) for option in _GROUPBY_OPTIONS],
+        )).encode())
+
+        # Keys naming columns outside the grouped object (eg. df.groupby('k')['v']) are hashed as group numbers.
+        labels = _grouping_labels(keys)
+        inside = isinstance(df.obj, pd.DataFrame) and all(key in df.obj.columns for key in labels)
+        if labels and not inside:
+            digest.update(_hash_values(df.ngroup()))
+            digest.update(_hash_values(df.size().index.to_series()))
+
+        if columns is not None and isinstance(df.obj, pd.DataFrame):
+            columns = list(columns) + [key for key in labels if key in df.obj.columns]
+        digest.update(fingerprint_frame(df.obj, sample, columns).encode())
+        return digest.hexdigest()
+
+    remembered = _remembered.get(id(df))
+    if remembered is not None and remembered[0]() is df:
+        return remembered[1]
+
+    digest.update(repr((type(df).__name__, df.shape)).encode())
+    if isinstance(df, pd.DataFrame):
+        digest.update(repr(list(zip(map(str, df.columns), map(str, df.dtypes)))).encode())
+    else:
+        digest.update(repr((str(df.name), str(df.dtype))).encode())
+
+    # Optionally restrict hashing to the columns a call reads, and to evenly spaced rows for very large inputs.
+    if isinstance(df, pd.DataFrame):
+        if columns is not None:
+            digest.update(repr(list(map(str, columns))).encode())
+        wanted = None if columns is None else set(columns)
+        values = [df.iloc[:, i] for i, column in enumerate(df.columns) if wanted is None or column in wanted]
+    else:
+        values = [df]
+    index = df.index
+    if sample is not None and len(df.index) > sample:
+        rows = np.linspace(0, len(df.index) - 1, sample, dtype=np.int64)
+        index = index[rows]
+        values = [value.iloc[rows] for value in values]
+
+    for value in [index] + values:
+        digest.update(_hash_values(value))
+    return digest.hexdigest()
+
+
+def _hash_values(values):
+    """Hash the values of a pd.Index or pd.Series, ignoring its labels.
+
+    :param values: pd.Index or pd.Series.
+    :return: bytes to add to a digest.
+    """
+    # Range indexes and plain NumPy arrays are hashed from their definition or raw memory, without per-cell hashing.
+    if isinstance(values, pd.RangeIndex):
+        return repr((values.start, values.stop, values.step)).encode()
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufcmM":
+        return hashlib.sha1(np.ascontiguousarray(values.to_numpy()).view(np.uint8)).digest()
+    try:
+        hashed = pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes()
+    except TypeError:
+        # Unhashable cells (lists, dicts) fall back to their pickled form.
+        return pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Object cells are hashed through str(), so 1 and '1' collide unless their types are hashed too.
+    if values.dtype == object and not isinstance(values, pd.MultiIndex):
+        codes, types = pd.factorize(np.array([type(x).__qualname__ for x in values.array], dtype=object))
+        hashed += codes.tobytes() + repr(list(types)).encode()
+    return hashed
+
+
+def remember_frame(df):
+    """Fingerprint a frame once and reuse the fingerprint for every later call.
+
+    Only register frames that are not modified afterwards, such as datasets held by a server.
+
+    :param df: pd.DataFrame or pd.Series to register.
+    :return: str, the stored fingerprint.
+    """
+    _remembered.pop(id(df), None)
+    fingerprint = fingerprint_frame(df)
+    ref = weakref.ref(df, lambda _, key=id(df): _remembered.pop(key, None))
+    _remembered[id(df)] = (ref, fingerprint)
+    return fingerprint
+
+
+def fingerprint_call(fn, *args, **kwargs):
+    """Compute a cache key for a function call, fingerprinting frames and aggregate closures.
+
+    :param fn: Function being called.
+    :param *args: Positional arguments of the call.
+    :param **kwargs: Keyword arguments of the call.
+    :return: str, hex digest identifying the call.
+    """
+    return _fingerprint_call(fn, args, kwargs)
+
+
+def _fingerprint_call(fn, args, kwargs, target=None):
+    """Compute a cache key for a function call.
+
+    :param fn: Function being called.
+    :param args: tuple of positional arguments.
+    :param kwargs: dict of keyword arguments.
+    :param target: str, name of the argument naming the only column the call reads. Frames are hashed on
+        that column (and their grouping keys) only. Hashes every column if None, defaults to None
+    :return: str, hex digest identifying the call.
+    """
+    try:
+        bound = inspect.signature(fn).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())
+    except (TypeError, ValueError):
+        arguments, target = [("args", args), ("kwargs", sorted(kwargs.items()))], None
+
+    fingerprints = []
+    for name, value in arguments:
+        columns = _target_columns(value, dict(arguments).get(target)) if target is not None else None
+        if columns is not None:
+            fingerprints.append((name, ("frame", fingerprint_frame(value, columns=columns))))
+        else:
+            fingerprints.append((name, _fingerprint_value(value)))
+
+    key = (
+        getattr(fn, "__module__", None),
+        getattr(fn, "__qualname__", repr(fn)),
+        fingerprints,
+    )
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+def _target_columns(value, target):
+    """Resolve the column a call reads from a frame argument, given by name or by position.
+
+    :param value: Argument value.
+    :param target: str or int, column name or position.
+    :return: list with the column label, or None if value is not a frame or the column cannot be resolved.
+    """
+    if isinstance(value, pd.core.groupby.GroupBy):
+        frame = value.obj
+    else:
+        frame = value
+    if not isinstance(frame, pd.DataFrame):
+        return None
+    try:
+        if target in frame.columns:
+            return [target]
+    except TypeError:
+        return None
+    try:
+        return [frame.columns[int(target)]]
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _grouping_labels(keys):
+    """List the hashable labels among groupby keys.
+
+    :param keys: Groupby keys, a label or a list of labels, Series or arrays.
+    :return: list of labels.
+    """
+    if not isinstance(keys, list):
+        keys = [keys]
+    labels = []
+    for key in keys:
+        try:
+            hash(key)
+        except TypeError:
+            continue
+        labels.append(key)
+    return labels
+
+
+def _fingerprint_value(value, seen=frozenset()):
+    """Convert an argument into a stable, repr-able fingerprint.
+
+    :param value: Argument value.
+    :param seen: frozenset of ids of functions being fingerprinted, to stop recursive closures, defaults to frozenset()
+    :return: Fingerprint of the value.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.core.groupby.GroupBy)):
+        return ("frame", fingerprint_frame(value))
+    if isinstance(value, Enum):
+        return ("enum", type(value).__name__, value.name)
+    if isinstance(value, functools.partial):
+        return ("partial", _fingerprint_value(value.func, seen), _fingerprint_value(value.args, seen), _fingerprint_value(value.keywords, seen))
+    if callable(value):
+        return _fingerprint_function(value, seen)
+    if isinstance(value, dict):
+        return ("dict", sorted((repr(k), _fingerprint_value(v, seen)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, [_fingerprint_value(v, seen) for v in value])
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__, sorted(repr(_fingerprint_value(v, seen)) for v in value))
+    if isinstance(value, np.ndarray):
+        return ("ndarray", str(value.dtype), value.shape, hashlib.sha1(value.tobytes()).hexdigest())
+    return repr(value)
+
+
+def _fingerprint_function(fn, seen):
+    """Fingerprint a callable by its code, defaults and closure contents.
+
+    Names alone are not enough: every lambda is called '<lambda>', and percentile(0.255) and
+    percentile(0.26) are both named '26%'.
+
+    :param fn: Callable argument.
+    :param seen: frozenset of ids of functions being fingerprinted.
+    :return: Fingerprint of the callable.
+    """
+    name = (getattr(fn, "__module__", None), getattr(fn, "__qualname__", getattr(fn, "__name__", repr(fn))))
+    code = getattr(fn, "__code__", None)
+
+    # Builtins and C functions (eg. np.mean) have no code object, so their name identifies them.
+    if code is None:
+        return ("fn",) + name
+    if id(fn) in seen:
+        return ("fn", "recursive") + name
+
+    seen = seen | {id(fn)}
+    cells = []
+    for cell in fn.__closure__ or ():
+        try:
+            cells.append(_fingerprint_value(cell.cell_contents, seen))
+        except ValueError:
+            # Cells that have not been assigned yet.
+            cells.append(None)
+
+    return ("fn",) + name + (
+        getattr(fn, "__name__", None),
+        _fingerprint_code(code),
+        _fingerprint_value(fn.__defaults__, seen),
+        _fingerprint_value(fn.__kwdefaults__, seen),
+        cells,
+    )
+
+
+def _fingerprint_code(code):
+    """Fingerprint a code object by its bytecode, constants and referenced names.
+
+    :param code: types.CodeType
+    :return: str, hex digest.
+    """
+    digest = hashlib.sha1(code.co_code)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            digest.update(_fingerprint_code(const).encode())
+        else:
+            digest.update(repr((type(const).__name__, const)).encode())
+    digest.update(repr((code.co_names, code.co_varnames, code.co_freevars)).encode())
+    return digest.hexdigest()
+
+
+def _sizeof(value):
+    """Estimate the memory footprint of a cached result.
+
+    :param value: Cached result.
+    :return: int, size in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return 0
+
+
+def _copy(value):
+    """Copy pandas results so callers cannot mutate cached entries.
+
+    :param value: Cached result.
+    :return: Copy of pandas objects, or the value itself.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+class ResultCache:
+    """
+    In-memory LRU cache of results with a size budget and an optional on-disk tier.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        """Initialize instance of ResultCache.
+
+        :param max_bytes: int, in-memory budget in bytes, defaults to DEFAULT_MAX_BYTES
+        :param directory: str, directory for the on-disk tier. Disabled if None, defaults to None
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __contains__(self, key):
+        with self._lock:
+            path = self._disk_path(key)
+            return key in self._entries or (path is not None and os.path.exists(path))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Find a cached result, promoting disk hits into memory.
+
+        :param key: str, cache key.
+        :param default: Value returned on a miss, defaults to None
+        :return: Cached result or default.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key][0]
+
+            path = self._disk_path(key)
+            if path is not None and os.path.exists(path):
+                try:
+                    with open(path, "rb") as f:
+                        value = pickle.load(f)
+                except (OSError, EOFError, pickle.UnpicklingError):
+                    pass
+                else:
+                    self._stats["disk_hits"] += 1
+                    self._store(key, value)
+                    return value
+
+            self._stats["misses"] += 1
+            return default
+
+    def put(self, key, value):
+        """Store a result in memory, and on disk if the on-disk tier is enabled.
+
+        :param key: str, cache key.
+        :param value: Result to cache.
+        """
+        with self._lock:
+            self._store(key, value)
+            path = self._disk_path(key)
+            if path is not None:
+                try:
+                    with open(path + ".tmp", "wb") as f:
+                        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(path + ".tmp", path)
+                except (OSError, pickle.PicklingError, TypeError, AttributeError):
+                    pass
+
+    def clear(self, disk=False):
+        """Remove every in-memory entry, and optionally the on-disk tier.
+
+        :param disk: bool, also delete cached files, defaults to False
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if disk and self.directory is not None:
+                for name in os.listdir(self.directory):
+                    if name.endswith(".pkl"):
+                        os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        """Report cache statistics for tuning the budget.
+
+        :return: dict containing hits, disk_hits, misses, evictions, entries, size_bytes, max_bytes and hit_rate.
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                size_bytes=self._size,
+                max_bytes=self.max_bytes,
+                hit_rate=(self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0,
+            )
+
+    def _store(self, key, value):
+        """Insert an entry in memory and evict least recently used entries over budget."""
+        size = _sizeof(value)
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+
+        # Results larger than the whole budget are only kept on disk.
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, size)
+        self._size += size
+        while self.max_bytes is not None and self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, key):
+        """Get the on-disk path for a key, or None if the on-disk tier is disabled."""
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, f"{key}.pkl")
+
+
+# Shared cache used by the memoized analyser functions.
+default_cache = ResultCache()
+
+# Sentinel distinguishing cached None results from misses.
+_MISSING = object()
+
+
+def memoize(fn=None, cache=None, target=None):
+    """Wrap a function so results are cached by the content of its arguments.
+
+    :param fn: Function to wrap. Returns a decorator if None, defaults to None
+    :param cache: ResultCache to store results in, defaults to default_cache
+    :param target: str, name of the argument naming the only column fn reads from its frames, so
+        only that column is hashed. Hashes every column if None, defaults to None
+    :return: Wrapped function, with the cache exposed as its `cache` attribute.
+    """
+    if fn is None:
+        return functools.partial(memoize, cache=cache, target=target)
+
+    store = default_cache if cache is None else cache
+
+    @functools.wraps(fn)
+    def _memoized(*args, **kwargs):
+        key = _fingerprint_call(fn, args, kwargs, target)
+        result = store.get(key, _MISSING)
+        if result is _MISSING:
+            result = fn(*args, **kwargs)
+            store.put(key, result)
+        return _copy(result)
+
+    _memoized.cache = store
+    return _memoized
+
+
+# Memoized versions of the analyser functions.
+find_in = memoize(analyser.find_in)
+agg = memoize(analyser.agg, target="target")
+describe_numeric = memoize(analyser.describe_numeric, target="target")
@@ -0,0 +1,286 @@
+# correlation.py - Contains vectorized correlation functions across indicators and terrorism incidence.
+
+# Import project custom modules.
+from ..utils.lazy import lazy_import
+
+# Import standard libraries.
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+# Import third-party libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Number of indicators at which work is split across countries in a thread pool.
+PARALLEL_INDICATORS = 8
+
+# Columns that identify rows rather than hold indicator values.
+_KEY_COLUMNS = {"original_index", "Country", "Entity", "Event ID", "Country ID"}
+
+
+class Method(Enum):
+    """Method, subclass of Enum.
+
+    :return: PEARSON, linear correlation of the values.
+    :return: SPEARMAN, linear correlation of the ranks of the values.
+    """
+    PEARSON = 0
+    SPEARMAN = 1
+
+
+# Dense (country, year, indicator) cube built from long frames.
+Panel = namedtuple("Panel", ["values", "codes", "years", "indicators"])
+
+
+def event_counts(gtd_df, countries_df, id_="Country ID", year="Year", years=None, name="Incidents"):
+    """Count GTD events per (country code, year), including zero counts for years without events.
+
+    GTD country IDs are mapped to the codes used by the MFI and PED tables, so the result can be
+    passed straight to build_panel. Every country in countries_df gets a row for every GTD year,
+    so years without attacks count as 0 rather than missing.
+
+    :param gtd_df: pd.DataFrame containing one row per event.
+    :param countries_df: pd.DataFrame of country codes (country_codes.tsv) with 'ID' and 'Code' columns.
+    :param id_: str, column holding the GTD country ID, defaults to 'Country ID'
+    :param year: str, column holding the event year, defaults to 'Year'
+    :param years: iterable[int], years covered by the GTD (eg. gtd_available_years.tsv). Uses the years present in gtd_df if None, defaults to None
+    :param name: str, fieldname to assign the count column, defaults to 'Incidents'
+    :return: Returns pd.DataFrame with 'Code', year and count columns, sorted by code and year.
+    """
+    codes = countries_df.drop_duplicates("ID").set_index("ID")["Code"]
+    events = pd.DataFrame({
+        "Code": gtd_df[id_].map(codes),
+        year: gtd_df[year],
+    }).dropna(subset=["Code"])
+
+    if years is None:
+        years = gtd_df[year].dropna().unique()
+    full = pd.MultiIndex.from_product(
+        [pd.Index(countries_df["Code"].dropna().unique()).sort_values(), pd.Index(years).unique().sort_values()],
+        names=["Code", year],
+    )
+    counts = events.groupby(["Code", year]).size().reindex(full, fill_value=0)
+    return counts.rename(name).astype(np.int64).reset_index()
+
+
+def build_panel(*frames, code="Code", year="Year", values=None, fill_years=True):
+    """Align long frames (MFI, PED, GTD counts) into a dense (country, year, indicator) array.
+
+    :param *frames: pd.DataFrame in long format with code, year and value columns.
+    :param code: str, column holding the country code, defaults to 'Code'
+    :param year: str, column holding the year, defaults to 'Year'
+    :param values: list[str], value columns to use. Infers numeric columns if None, defaults to None
+    :param fill_years: bool, include every year between the first and last so lags are in years, defaults to True
+    :return: Returns Panel with values of shape (countries, years, indicators). Missing cells are NaN.
+    """
+    series = []
+    for df in frames:
+        columns = values
+        if columns is None:
+            columns = [
+                c for c in df.select_dtypes(include="number").columns
+                if c not in (code, year) and c not in _KEY_COLUMNS
+            ]
+        columns = [c for c in columns if c in df.columns]
+        if len(columns) > 0:
+            series.append(df.groupby([code, year])[columns].mean())
+
+    if len(series) == 0:
+        raise ValueError("No indicator columns found to build panel from.")
+
+    # Outer join every indicator on (country, year).
+    joined = pd.concat(series, axis=1, join="outer")
+    joined = joined.loc[:, ~joined.columns.duplicated()]
+
+    codes = joined.index.get_level_values(0).unique().sort_values()
+    years = joined.index.get_level_values(1).unique().sort_values()
+    if fill_years and len(years) > 0:
+        years = pd.Index(np.arange(int(years.min()), int(years.max()) + 1), name=year)
+
+    full = pd.MultiIndex.from_product([codes, years], names=[code, year])
+    dense = joined.reindex(full).to_numpy(dtype=np.float64)
+    cube = dense.reshape(len(codes), len(years), len(joined.columns))
+    return Panel(cube, codes, years, pd.Index(joined.columns))
+
+
+def correlate(panel, method=Method.PEARSON, min_periods=3):
+    """Correlation matrix between indicators, pooled over every (country, year) cell.
+
+    :param panel: Panel from build_panel.
+    :param method: Method, correlation method, defaults to Method.PEARSON
+    :param min_periods: int, minimum number of complete pairs required, defaults to 3
+    :return: Returns pd.DataFrame of shape (indicators, indicators).
+    """
+    X = panel.values.reshape(-1, len(panel.indicators))
+    r = _correlate_pairs(X[np.newaxis], method, min_periods)[0]
+    return pd.DataFrame(r, index=panel.indicators, columns=panel.indicators)
+
+
+def correlate_by_country(panel, method=Method.PEARSON, min_periods=3, workers=None):
+    """Correlation matrix between indicators for every country at once.
+
+    :param panel: Panel from build_panel.
+    :param method: Method, correlation method, defaults to Method.PEARSON
+    :param min_periods: int, minimum number of complete years required, defaults to 3
+    :param workers: int, threads to split countries across. Chosen from the indicator count if None, defaults to None
+    :return: Returns pd.DataFrame indexed by (code, indicator), with a column per indicator (like groupby().corr()).
+    """
+    def _correlate(X):
+        return _correlate_pairs(X, method, min_periods)
+
+    r = _map_countries(_correlate, panel.values, _workers(workers, len(panel.indicators)))
+    index = pd.MultiIndex.from_product([panel.codes, panel.indicators], names=[panel.codes.name, None])
+    return pd.DataFrame(r.reshape(-1, len(panel.indicators)), index=index, columns=panel.indicators)
+
+
+def lagged_correlation(panel, x, y, lags=range(0, 6), method=Method.PEARSON, min_periods=3, workers=None):
+    """Correlate indicator x in year t with indicator y in year t + k, for every country and lag k.
+
+    :param panel: Panel from build_panel, with fill_years=True so steps are years.
+    :param x: str, leading indicator.
+    :param y: str, lagging indicator.
+    :param lags: iterable[int], lags in years to evaluate, defaults to range(0, 6)
+    :param method: Method, correlation method, defaults to Method.PEARSON
+    :param min_periods: int, minimum number of complete pairs required, defaults to 3
+    :param workers: int, threads to split countries across. Chosen from the indicator count if None, defaults to None
+    :return: Returns pd.DataFrame indexed by code, with a column per lag.
+    """
+    i = panel.indicators.get_loc(x)
+    j = panel.indicators.get_loc(y)
+    lags = list(lags)
+    T = len(panel.years)
+
+    def _correlate(X):
+        results = np.full((X.shape[0], len(lags)), np.nan)
+        for n, lag in enumerate(lags):
+            if abs(lag) >= T:
+                continue
+            # Align x[t] with y[t + lag] along the year axis.
+            if lag >= 0:
+                pair = np.stack([X[:, :T - lag, i], X[:, lag:, j]], axis=-1)
+            else:
+                pair = np.stack([X[:, -lag:, i], X[:, :T + lag, j]], axis=-1)
+            results[:, n] = _correlate_pairs(pair, method, min_periods)[:, 0, 1]
+        return results
+
+    r = _map_countries(_correlate, panel.values, _workers(workers, len(panel.indicators)))
+    return pd.DataFrame(r, index=panel.codes, columns=pd.Index(lags, name="Lag"))
+
+
+def _correlate_pairs(X, method, min_periods):
+    """Pairwise correlation with the given method, batched over the first axis.
+
+    :param X: np.ndarray of shape (batch, observations, indicators).
+    :param method: Method, correlation method.
+    :param min_periods: int, minimum number of complete pairs required.
+    :return: np.ndarray of correlations of shape (batch, indicators, indicators).
+    """
+    if method == Method.SPEARMAN:
+        return _spearman(X, min_periods)
+    return _pairwise(X, min_periods)[0]
+
+
+def _spearman(X, min_periods):
+    """Spearman correlation, ranking each pair of columns over the rows where both are present (like pd.DataFrame.corr).
+
+    Columns are ranked once, which is exact for pairs missing the same rows. Only pairs whose
+    missing rows differ are ranked again over their shared rows.
+
+    :param X: np.ndarray of shape (batch, observations, indicators).
+    :param min_periods: int, minimum number of complete pairs required.
+    :return: np.ndarray of correlations of shape (batch, indicators, indicators).
+    """
+    r, _ = _pairwise(_rank(X), min_periods)
+    present = ~np.isnan(X)
+    K = X.shape[-1]
+    for i in range(K):
+        for j in range(i + 1, K):
+            both = present[..., i] & present[..., j]
+            stale = ((both != present[..., i]) | (both != present[..., j])).any(axis=-1)
+            if not stale.any():
+                continue
+            pair = np.where(both[stale][..., np.newaxis], X[stale][..., [i, j]], np.nan)
+            r[stale, i, j] = r[stale, j, i] = _pairwise(_rank(pair), min_periods)[0][:, 0, 1]
+    return r
+
+
+def _pairwise(X, min_periods):
+    """NaN-aware pairwise Pearson correlation over the second-to-last axis, batched over leading axes.
+
+    Each pair of columns only uses rows where both are present.
+
+    :param X: np.ndarray of shape (..., observations, indicators).
+    :param min_periods: int, minimum number of complete pairs required.
+    :return: tuple(np.ndarray, np.ndarray) of correlations and pair counts, each of shape (..., indicators, indicators).
+    """
+    present = ~np.isnan(X)
+    M = present.astype(np.float64)
+
+    # Center each column to limit cancellation in the sums below.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        center = np.nanmean(X, axis=-2, keepdims=True)
+    X0 = np.where(present, X - np.nan_to_num(center), 0.0)
+
+    Mt = np.swapaxes(M, -1, -2)
+    X0t = np.swapaxes(X0, -1, -2)
+    n = Mt @ M
+    sx = X0t @ M
+    sxx = (X0t ** 2) @ M
+    sxy = X0t @ X0
+    sy = np.swapaxes(sx, -1, -2)
+    syy = np.swapaxes(sxx, -1, -2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = n * sxy - sx * sy
+        r = cov / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+    r = np.clip(r, -1.0, 1.0)
+    r[n < max(min_periods, 2)] = np.nan
+    return r, n
+
+
+def _rank(X):
+    """Average ranks along the second-to-last axis, ignoring NaN.
+
+    Ranks are computed per column over its available values. See _spearman for ranks per pair.
+
+    :param X: np.ndarray of shape (batch, observations, indicators).
+    :return: np.ndarray of the same shape containing ranks, with NaN preserved.
+    """
+    B, T, K = X.shape
+    flat = np.swapaxes(X, 0, 1).reshape(T, B * K)
+    ranks = pd.DataFrame(flat).rank(axis=0, method="average").to_numpy()
+    return np.swapaxes(ranks.reshape(T, B, K), 0, 1)
+
+
+def _workers(workers, indicators):
+    """Choose the number of threads used to split countries.
+
+    :param workers: int or None, explicit number of workers.
+    :param indicators: int, number of indicators requested.
+    :return: int
+    """
+    if workers is not None:
+        return workers
+    if indicators >= PARALLEL_INDICATORS:
+        return os.cpu_count() or 1
+    return 1
+
+
+def _map_countries(fn, values, workers):
+    """Apply fn to blocks of countries, in a thread pool when workers > 1. NumPy releases the GIL for matmul.
+
+    :param fn: function mapping an array of shape (countries, ...) to results with countries first.
+    :param values: np.ndarray, with countries on the first axis.
+    :param workers: int, number of threads.
+    :return: np.ndarray of results concatenated in country order.
+    """
+    if workers <= 1 or values.shape[0] < 2:
+        return fn(values)
+
+    blocks = np.array_split(values, min(workers, values.shape[0]), axis=0)
+    with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+        return np.concatenate(list(executor.map(fn, blocks)), axis=0)
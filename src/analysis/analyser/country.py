@@ -5,13 +5,16 @@
 # Import utilities for initializing the analyzer.
 from ..utils import validate
 from ..utils import formatter
+from ..utils.lazy import lazy_import
 from ..analyser import analyser
 
 # Import standard libraries.
 from enum import Enum
+from functools import total_ordering
 
-# Import scikit libraries.
-import pandas as pd
+# Import scikit libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 # Map of human readable type name to actual value.
 class IDType(Enum):
@@ -20,6 +23,7 @@ class IDType(Enum):
     LABEL = 2
 
 # Instance of a country key.
+@total_ordering
 class Country:
     """
     Representation of a country key.
@@ -69,7 +73,90 @@ class Country:
 
             # If not empty, has correct schema, return list of Country objects.
             return Country.from_frame(countries_df)               
-        
+    
+    @classmethod
+    def sort(cls, countries, by=IDType.ID, reverse=False):
+        """Sort an iterable[Country] using key arrays instead of per-item comparisons.
+
+        :param countries: iterable[Country] to sort.
+        :param by: IDType, primary identifier to sort by. Ties are broken by the remaining identifiers, defaults to IDType.ID
+        :param reverse: bool, sort in descending order, defaults to False
+        :return: list[Country], sorted. Countries missing the primary identifier are placed last.
+        """
+        countries = list(countries)
+        if len(countries) == 0:
+            return countries
+
+        # Build one (values, missing) pair of key arrays per identifier, with missing values ordered last
+        # like _sort_key. np.lexsort sorts by the last key first.
+        ids, missing_ids = cls._id_array(countries)
+        codes = np.array([c.code or "" for c in countries], dtype=str)
+        missing_codes = np.array([c.code is None for c in countries], dtype=bool)
+        labels = np.array([c.label or "" for c in countries], dtype=str)
+        missing_labels = np.array([c.label is None for c in countries], dtype=bool)
+        keys = {
+            # Same key as _sort_key, so Country.sort(countries) matches sorted(countries).
+            IDType.ID: (codes, missing_codes, ids, missing_ids),
+            IDType.CODE: (labels, missing_labels, ids, missing_ids, codes, missing_codes),
+            IDType.LABEL: (codes, missing_codes, ids, missing_ids, labels, missing_labels),
+        }
+        if by not in keys:
+            raise ValueError(f"Cannot sort by identifier type {by}.")
+
+        order = np.lexsort(keys[by])
+        if reverse:
+            # Keep countries missing the identifier last when reversing.
+            missing = keys[by][-1][order]
+            order = np.concatenate([order[~missing][::-1], order[missing]])
+        return [countries[i] for i in order]
+
+    @classmethod
+    def unique(cls, countries):
+        """Remove duplicate Country instances (by ID and Code), keeping the first occurrence of each.
+
+        :param countries: iterable[Country] to deduplicate.
+        :return: list[Country], in original order.
+        """
+        return list(dict.fromkeys(countries))
+
+    @classmethod
+    def union(cls, *collections):
+        """Find every Country present in any of the collections.
+
+        :return: list[Country], sorted by ID.
+        """
+        results = set()
+        for collection in collections:
+            results.update(collection)
+        return cls.sort(results)
+
+    @classmethod
+    def intersection(cls, *collections):
+        """Find every Country present in all of the collections.
+
+        :return: list[Country], sorted by ID.
+        """
+        if len(collections) == 0:
+            return []
+        # Filter the first collection, so its instances (and labels) are the ones returned.
+        results = cls.unique(collections[0])
+        for collection in collections[1:]:
+            members = set(collection)
+            results = [country for country in results if country in members]
+        return cls.sort(results)
+
+    @classmethod
+    def difference(cls, collection, *others):
+        """Find every Country in the first collection that is not present in any of the others.
+
+        :param collection: iterable[Country] to subtract from.
+        :return: list[Country], sorted by ID.
+        """
+        results = set(collection)
+        for other in others:
+            results.difference_update(other)
+        return cls.sort(results)
+
     ################
     # Constructors #
     ################
@@ -256,6 +343,8 @@ class Country:
         if instance.id_ is None or instance.code is None:
             return False    
         
+        return True
+        
     ##############
     # Properties #
     ##############
@@ -414,6 +503,37 @@ class Country:
         if id_type and id_type == validation_type:
             self._identifier[id_type] = identifier
 
+    ########################
+    # Comparison Operators #
+    ########################
+
+    def __eq__(self, other):
+        """Countries are equal when their ID and Code match. Labels can be mismatched.
+
+        :param other: Country to compare against.
+        :return: bool, or NotImplemented if other is not a Country.
+        """
+        if not isinstance(other, Country):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __lt__(self, other):
+        """Order Countries by ID, then Code. Countries missing either are ordered last.
+
+        :param other: Country to compare against.
+        :return: bool, or NotImplemented if other is not a Country.
+        """
+        if not isinstance(other, Country):
+            return NotImplemented
+        return self._sort_key() < other._sort_key()
+
+    def __hash__(self):
+        """Hash on the same (ID, Code) key used for equality.
+
+        :return: int
+        """
+        return hash(self._key())
+
     ###################
     # Service Methods #
     ###################   
@@ -424,31 +544,31 @@ class Country:
         
         # Labels can be mismatched.
         # Now return comparison between the keys, the id and code. They must match exactly.
-        return self.id_ == other.id_ and self.code == other.code
+        return self._key() == other._key()
         
     def el(self, other):
         if not Country.is_valid(other) or not Country.is_valid(self):
             return False
 
-        return self.id_ <= other.id_
+        return self._key()[0] <= other._key()[0]
 
     def eg(self, other):
         if not Country.is_valid(other) or not Country.is_valid(self):
             return False
 
-        return self.id_ >= other.id_ 
+        return self._key()[0] >= other._key()[0]
     
     def lt(self, other):
         if not Country.is_valid(other) or not Country.is_valid(self):
             return False
 
-        return self.id_ < other.id_
+        return self._key()[0] < other._key()[0]
 
     def gt(self, other):
         if not Country.is_valid(other) or not Country.is_valid(self):
             return False
 
-        return self.id_ > other.id_ 
+        return self._key()[0] > other._key()[0]
         
     def to_frame(self, *args, **kwargs):
         """Export instance values as a DataFrame.
@@ -492,6 +612,46 @@ class Country:
     ###################
     # Private Methods #
     ###################
+
+    def _key(self):
+        """Get the (ID, Code) key used for equality and hashing, with numeric IDs normalized (see _normalize_id).
+
+        :return: tuple
+        """
+        return (self._normalize_id(self.id_), self.code)
+
+    @staticmethod
+    def _normalize_id(id_):
+        """Normalize an ID so '4', 4 and 4.0 compare equal, without truncating non-integral IDs such as 4.7.
+
+        :param id_: str or numeric ID, or None.
+        :return: int, float for non-integral IDs, or None.
+        """
+        if id_ is None:
+            return None
+        number = int(id_)
+        if isinstance(id_, str) or number == id_:
+            return number
+        return float(id_)
+
+    def _sort_key(self):
+        """Get a key that orders by ID, then Code, with missing identifiers last.
+
+        :return: tuple
+        """
+        id_, code = self._key()
+        return (id_ is None, id_ or 0, code is None, code or "")
+
+    @classmethod
+    def _id_array(cls, countries):
+        """Build a numeric key array of IDs, with a mask of missing IDs.
+
+        :param countries: list[Country]
+        :return: tuple(np.ndarray, np.ndarray) of float64 IDs and bool missing flags.
+        """
+        missing = np.array([c.id_ is None for c in countries], dtype=bool)
+        ids = np.array([0 if c.id_ is None else cls._normalize_id(c.id_) for c in countries], dtype=np.float64)
+        return ids, missing
         
     def _get_identifier_type(self, identifier):
         """Get country identifier type for flexible assignment purposes.
@@ -0,0 +1,296 @@
+# sampling.py - Contains stratified samples for fast, approximate describe_numeric queries.
+
+# Import project custom modules and Classes.
+from ..analyser import cache
+from ..utils.lazy import lazy_import
+
+# Import standard libraries.
+import math
+import pickle
+import time
+from statistics import NormalDist
+
+# Import third-party libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Default number of sampled rows when no size, error bound or time budget is given.
+DEFAULT_SIZE = 10000
+
+# Number of rows used to estimate variability and throughput when sizing a sample.
+PILOT_SIZE = 2000
+
+# Column holding each sampled row's stratum id.
+STRATUM = "_stratum"
+
+# Statistics reported by describe_numeric, mirroring analyser.describe_numeric.
+STATISTICS = ["count", "mean", "std", "var", "min", "max", "range", "0%", "25%", "50%", "75%", "100%", "IQR"]
+
+
+class StratifiedSample:
+    """
+    Persistent stratified sample of a pd.DataFrame, with population counts per stratum.
+    """
+
+    ################
+    # Constructors #
+    ################
+
+    def __init__(self, sample, strata, populations, fingerprint=None):
+        """Initialize instance of StratifiedSample. Use StratifiedSample.from_frame to draw one.
+
+        :param sample: pd.DataFrame of sampled rows, with a STRATUM column.
+        :param strata: list[str], columns the population was stratified by.
+        :param populations: pd.Series of population row counts, indexed by stratum id.
+        :param fingerprint: str, fingerprint of the source pd.DataFrame, defaults to None
+        """
+        self.sample = sample
+        self.strata = list(strata)
+        self.populations = populations
+        self.sampled = sample[STRATUM].value_counts()
+        self.weights = (populations / self.sampled).dropna()
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_frame(cls, df, strata, size=None, error=None, target=None, time_budget=None,
+                   confidence=0.95, min_per_stratum=2, seed=None):
+        """Draw a stratified sample, sized by an explicit size, a relative error bound, or a time budget.
+
+        :param df: pd.DataFrame containing the full dataset.
+        :param strata: str or list[str], columns to stratify by (eg. country, region, year).
+        :param size: int, total rows to sample, defaults to None
+        :param error: float, relative error bound on the mean of target (eg. 0.01 for 1%), defaults to None
+        :param target: str, column the error bound applies to. Required with error, defaults to None
+        :param time_budget: float, seconds allowed for describe_numeric on the sample, defaults to None
+        :param confidence: float, confidence level for the error bound, defaults to 0.95
+        :param min_per_stratum: int, minimum rows kept from every stratum, defaults to 2
+        :param seed: int, random seed, defaults to None
+        :raise ValueError: Raises ValueError if error is given without target.
+        :return: StratifiedSample
+        """
+        if isinstance(strata, str):
+            strata = [strata]
+        rng = np.random.default_rng(seed)
+
+        if size is None:
+            size = cls._size_for(df, rng, error, target, time_budget, confidence)
+        size = int(min(max(size, 1), len(df.index)))
+
+        # Shuffle once, then keep the first n_h rows of every stratum.
+        shuffled = df.iloc[rng.permutation(len(df.index))]
+        ids = shuffled.groupby(strata, sort=False, dropna=False).ngroup()
+        populations = ids.value_counts().sort_index()
+        allocation = cls._allocate(populations, size, min_per_stratum)
+        ranks = ids.groupby(ids).cumcount().to_numpy()
+        keep = ranks < allocation.reindex(ids.to_numpy()).to_numpy()
+
+        sample = shuffled[keep].copy()
+        sample[STRATUM] = ids.to_numpy()[keep]
+        sample = sample.sort_index()
+        return cls(sample, strata, populations.rename("N"), cache.fingerprint_frame(df))
+
+    @classmethod
+    def load(cls, path):
+        """Load a sample saved with StratifiedSample.save.
+
+        :param path: str, path to the pickled sample.
+        :return: StratifiedSample
+        """
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save(self, path):
+        """Persist the sample, so it can be reused across sessions.
+
+        :param path: str, path to write the pickled sample to.
+        """
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __repr__(self):
+        return f'StratifiedSample(rows={len(self.sample.index)}, strata={self.strata}, population={int(self.populations.sum())})'
+
+    def __len__(self):
+        return len(self.sample.index)
+
+    ###################
+    # Service Methods #
+    ###################
+
+    def matches(self, df):
+        """Check if the sample was drawn from this exact pd.DataFrame.
+
+        :param df: pd.DataFrame to compare against.
+        :return: bool, False if the data has changed since sampling.
+        """
+        return self.fingerprint == cache.fingerprint_frame(df)
+
+    def describe_numeric(self, target=1, by=None, confidence=0.95):
+        """Estimate describe_numeric statistics from the sample, with confidence intervals.
+
+        Means, counts and quantiles have confidence intervals. The min, max, range and IQR are
+        taken from the sample and have no interval.
+
+        :param target: str or int, column to describe, defaults to 1
+        :param by: str or list[str], columns to group the estimates by, defaults to None
+        :param confidence: float, confidence level of the intervals, defaults to 0.95
+        :return: Returns pd.DataFrame indexed by group, with (statistic, estimate/lower/upper) columns.
+        """
+        if not isinstance(target, str) and target not in self.sample.columns:
+            target = self.sample.columns.values[int(target)]
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        if by is None:
+            groups = [("All", self.sample)]
+        else:
+            groups = self.sample.groupby(by, sort=True)
+
+        rows = {}
+        for key, group in groups:
+            rows[key] = self._describe(group, target, z)
+
+        columns = pd.MultiIndex.from_product([STATISTICS, ["estimate", "lower", "upper"]])
+        results = pd.DataFrame(list(rows.values()), index=pd.Index(list(rows.keys())), columns=columns)
+        if by is not None:
+            results.index.names = [by] if isinstance(by, str) else by
+        return results
+
+    ###################
+    # Private Methods #
+    ###################
+
+    def _describe(self, group, target, z):
+        """Estimate statistics for one group of sampled rows.
+
+        :param group: pd.DataFrame of sampled rows.
+        :param target: str, column to describe.
+        :param z: float, standard normal quantile of the confidence level.
+        :return: list of (estimate, lower, upper) values, flattened in STATISTICS order.
+        """
+        nan = (np.nan, np.nan, np.nan)
+
+        # Per-stratum sample sizes, means and variances. Groups may only cover part of a stratum.
+        strata = group.groupby(STRATUM)[target].agg(["count", "mean", "var"])
+        N_h = self.populations.reindex(strata.index).to_numpy(dtype=np.float64)
+        n_all = self.sampled.reindex(strata.index).to_numpy(dtype=np.float64)
+        n_h = strata["count"].to_numpy(dtype=np.float64)
+        mean_h = strata["mean"].to_numpy(dtype=np.float64)
+        var_h = np.nan_to_num(strata["var"].to_numpy(dtype=np.float64))
+
+        # Population rows with a value, scaled from each stratum's non-null share.
+        p_h = n_h / n_all
+        valid_h = N_h * p_h
+        N = valid_h.sum()
+        if N == 0:
+            return [v for _ in STATISTICS for v in nan]
+
+        # Count: Var = sum N_h^2 (1 - f_h) p_h (1 - p_h) / (n_h - 1).
+        f_h = n_all / N_h
+        with np.errstate(divide="ignore", invalid="ignore"):
+            count_var = np.nansum(N_h ** 2 * (1 - f_h) * p_h * (1 - p_h) / np.maximum(n_all - 1, 1))
+        count = self._interval(N, count_var, z)
+
+        # Mean: Var = sum W_h^2 (1 - f_h) s_h^2 / n_h.
+        nonempty = n_h > 0
+        W_h = valid_h[nonempty] / N
+        mean = float(np.sum(W_h * mean_h[nonempty]))
+        mean_var = float(np.sum(W_h ** 2 * (1 - f_h[nonempty]) * var_h[nonempty] / n_h[nonempty]))
+        mean_ci = self._interval(mean, mean_var, z)
+
+        # Row weights N_h / n_h for variance and quantile estimates.
+        values = group[target]
+        present = values.notna().to_numpy()
+        y = values.to_numpy(dtype=np.float64, na_value=np.nan)[present]
+        weights = self.weights.reindex(group[STRATUM].to_numpy()).to_numpy()[present]
+        order = np.argsort(y, kind="mergesort")
+        y, weights = y[order], weights[order]
+
+        total = weights.sum()
+        var = float(np.sum(weights * (y - mean) ** 2) / max(total - 1, 1))
+        std = math.sqrt(var)
+        low, high = float(y[0]), float(y[-1])
+
+        # Quantile intervals from the binomial rank bound, using Kish's effective sample size.
+        n_eff = total ** 2 / np.sum(weights ** 2)
+        cumulative = (np.cumsum(weights) - weights / 2) / total
+
+        def quantile(q):
+            return float(np.interp(q, cumulative, y))
+
+        def quantile_ci(q):
+            spread = z * math.sqrt(q * (1 - q) / n_eff)
+            return (quantile(q), quantile(max(q - spread, 0.0)), quantile(min(q + spread, 1.0)))
+
+        q25, q75 = quantile(0.25), quantile(0.75)
+        results = [
+            count,
+            mean_ci,
+            (std, np.nan, np.nan),
+            (var, np.nan, np.nan),
+            (low, np.nan, np.nan),
+            (high, np.nan, np.nan),
+            (high - low, np.nan, np.nan),
+            (low, np.nan, np.nan),
+            quantile_ci(0.25),
+            quantile_ci(0.5),
+            quantile_ci(0.75),
+            (high, np.nan, np.nan),
+            (q75 - q25, np.nan, np.nan),
+        ]
+        return [v for stat in results for v in stat]
+
+    @staticmethod
+    def _interval(estimate, variance, z):
+        """Build a normal-approximation confidence interval.
+
+        :return: tuple(estimate, lower, upper)
+        """
+        margin = z * math.sqrt(max(variance, 0.0))
+        return (estimate, estimate - margin, estimate + margin)
+
+    @staticmethod
+    def _allocate(populations, size, min_per_stratum):
+        """Allocate sample rows to strata proportionally to their size.
+
+        :param populations: pd.Series of population row counts per stratum.
+        :param size: int, total rows to sample.
+        :param min_per_stratum: int, minimum rows kept from every stratum.
+        :return: pd.Series of rows to keep per stratum.
+        """
+        share = np.ceil(populations * (size / populations.sum())).astype(np.int64)
+        return np.minimum(np.maximum(share, min_per_stratum), populations)
+
+    @classmethod
+    def _size_for(cls, df, rng, error, target, time_budget, confidence):
+        """Choose a total sample size from an error bound and/or a time budget, using a pilot sample.
+
+        :return: int, total rows to sample.
+        """
+        if error is None and time_budget is None:
+            return DEFAULT_SIZE
+
+        pilot = df.iloc[rng.choice(len(df.index), size=min(PILOT_SIZE, len(df.index)), replace=False)]
+        sizes = []
+
+        if error is not None:
+            if target is None:
+                raise ValueError("Cannot size sample by error bound without a target column.")
+            values = pilot[target].dropna()
+            mean, std = values.mean(), values.std()
+            if len(values.index) < 2 or mean == 0 or np.isnan(std):
+                sizes.append(len(df.index))
+            else:
+                # n = (z * cv / e)^2 for a relative error e on the mean.
+                z = NormalDist().inv_cdf(0.5 + confidence / 2)
+                sizes.append(math.ceil((z * std / (error * abs(mean))) ** 2))
+
+        if time_budget is not None:
+            # Time describe_numeric on the pilot sample and scale the rows to the budget.
+            column = target if target is not None else pilot.select_dtypes(include="number").columns[0]
+            trial = cls(pilot.assign(**{STRATUM: 0}), [], pd.Series([len(pilot.index)], name="N"))
+            start = time.perf_counter()
+            trial.describe_numeric(column)
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            sizes.append(int(len(pilot.index) * time_budget / elapsed))
+
+        return min(sizes)
@@ -0,0 +1,141 @@
+# cli.py - Command-line entry point for running summaries without a notebook.
+
+# Import project custom modules.
+from .utils import parser
+from .analyser import analyser
+from . import service
+
+# Import standard libraries.
+import argparse
+import sys
+import time
+
+
+def _read(path):
+    """Read a tsv file for a command.
+
+    :param path: str, path to the tsv file.
+    :return: pd.DataFrame
+    """
+    return parser.read_tsv(path)
+
+
+def _target(df, target):
+    """Resolve a column given by name or by position.
+
+    :param df: pd.DataFrame
+    :param target: str, column name or position.
+    :return: str column name.
+    """
+    if target not in df.columns and target.lstrip("-").isdigit():
+        return df.columns.values[int(target)]
+    return target
+
+
+def load(args):
+    """Parse a file and print its shape, dtypes and memory footprint."""
+    df = _read(args.path)
+    print(f'{args.path}: {len(df.index)} rows x {len(df.columns)} columns, '
+          f'{df.memory_usage(deep=True).sum() / 1024 ** 2:.2f} MiB')
+    print(df.dtypes.to_string())
+    if args.validate:
+        from .utils import validate
+        print(validate.validation_report(df).to_string())
+
+
+def describe(args):
+    """Print describe_numeric statistics for a column, optionally grouped."""
+    df = _read(args.path)
+    target = _target(df, args.target)
+    if args.by:
+        df = df.groupby(args.by)
+    print(analyser.describe_numeric(df, target).to_string())
+
+
+def intersect(args):
+    """Print the values shared by every given PATH:COLUMN."""
+    values = []
+    for spec in args.columns:
+        path, _, column = spec.rpartition(":")
+        if not path:
+            raise SystemExit(f"Expected PATH:COLUMN, got '{spec}'.")
+        df = _read(path)
+        values.append(df[_target(df, column)].dropna().unique())
+    for value in sorted(analyser.find_intersection(*values), key=str):
+        print(value)
+
+
+def export(args):
+    """Stream a file to a (compressed) tsv file."""
+    df = _read(args.path)
+    rows = parser.write_tsv(
+        df, args.output,
+        chunksize=args.chunksize,
+        compression=args.compression,
+        compresslevel=args.level,
+        workers=args.workers,
+        index=False,
+    )
+    print(f'Wrote {rows} rows to {args.output}')
+
+
+def serve(args):
+    """Run the query server."""
+    from .service import server
+    server.run(args)
+
+
+def build_parser():
+    """Build the argument parser for `python -m analysis`.
+
+    :return: argparse.ArgumentParser
+    """
+    arguments = argparse.ArgumentParser(prog="python -m analysis", description="Summarize the analysis datasets.")
+    arguments.add_argument("--time", action="store_true", help="print elapsed startup and run time to stderr")
+    commands = arguments.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("load", help="parse a file and print its shape and dtypes")
+    command.add_argument("path")
+    command.add_argument("--validate", action="store_true", help="also print a validation report")
+    command.set_defaults(run=load)
+
+    command = commands.add_parser("describe", help="print describe_numeric statistics for a column")
+    command.add_argument("path")
+    command.add_argument("target", help="column name or position")
+    command.add_argument("--by", nargs="+", help="columns to group by")
+    command.set_defaults(run=describe)
+
+    command = commands.add_parser("intersect", help="print values shared by every PATH:COLUMN")
+    command.add_argument("columns", nargs="+", metavar="PATH:COLUMN")
+    command.set_defaults(run=intersect)
+
+    command = commands.add_parser("export", help="stream a file to a (compressed) tsv file")
+    command.add_argument("path")
+    command.add_argument("output")
+    command.add_argument("--compression", default="infer", help="gzip, xz, zstd, or infer from the extension")
+    command.add_argument("--level", type=int, default=None, help="compression level")
+    command.add_argument("--chunksize", type=int, default=parser.DEFAULT_CHUNKSIZE, help="rows per batch")
+    command.add_argument("--workers", type=int, default=0, help="threads formatting batches")
+    command.set_defaults(run=export)
+
+    command = commands.add_parser("serve", help="run the query server (see analysis.service.server)")
+    service.add_arguments(command)
+    command.set_defaults(run=serve)
+
+    return arguments
+
+
+def main(argv=None, started=None):
+    """Run a command.
+
+    :param argv: list[str], arguments, defaults to sys.argv[1:]
+    :param started: float, time.perf_counter() value when the process started, defaults to None
+    """
+    if started is None:
+        started = time.perf_counter()
+    args = build_parser().parse_args(argv)
+
+    ready = time.perf_counter()
+    args.run(args)
+    if args.time:
+        print(f'startup: {ready - started:.3f}s, run: {time.perf_counter() - ready:.3f}s', file=sys.stderr)
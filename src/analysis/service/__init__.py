@@ -0,0 +1,16 @@
+# service/__init__.py
+
+# print(f"Imported {__name__} analysis/service/__init__.py")
+
+
+def add_arguments(arguments):
+    """Declare the query server options on an argument parser, shared by server.main and `python -m analysis serve`.
+
+    Kept here rather than in server.py, so building the command-line parser does not import the server.
+
+    :param arguments: argparse.ArgumentParser to add the options to.
+    """
+    arguments.add_argument("--data", default="data", help="path to the data directory")
+    arguments.add_argument("--socket", default=None, help="Unix socket path")
+    arguments.add_argument("--port", type=int, default=None, help="serve on localhost TCP instead of a Unix socket")
+    arguments.add_argument("--workers", type=int, default=None, help="number of worker threads, defaults to the CPU count")
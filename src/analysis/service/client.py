@@ -0,0 +1,274 @@
+# client.py - Thin client mirroring the analyser functions against a running query server.
+
+# Import project custom modules and Classes.
+from ..analyser import analyser
+from . import protocol
+from .protocol import RemoteFrame, RemoteColumn
+
+# Import standard libraries.
+import threading
+
+# Default client used by the module-level functions.
+_default = None
+
+
+class Client:
+    """
+    Connection to a query server started with `python -m analysis.service.server`.
+    """
+
+    def __init__(self, address=protocol.DEFAULT_ADDRESS, authkey=None):
+        """Initialize instance of Client, connect to the server and authenticate both ends.
+
+        :param address: str Unix socket path, or tuple(host, port), defaults to protocol.DEFAULT_ADDRESS
+        :param authkey: bytes, shared key. Read from protocol.DEFAULT_AUTHKEY_PATH if None, defaults to None
+        :raise protocol.AuthenticationError: Raises AuthenticationError if either end does not hold the key.
+        """
+        if authkey is None:
+            authkey = protocol.read_authkey()
+        self.address = address
+        self._socket = protocol.connect(address)
+        self._stream = self._socket.makefile("rwb")
+        try:
+            protocol.answer_challenge(self._stream, self._stream, authkey)
+        except Exception:
+            self.close()
+            raise
+        self._lock = threading.Lock()
+        self._batch = None
+
+    def close(self):
+        """Close the connection."""
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    ###################
+    # Service Methods #
+    ###################
+
+    def frame(self, name):
+        """Reference a dataset held by the server.
+
+        :param name: str, dataset name.
+        :return: RemoteFrame
+        """
+        return RemoteFrame(name)
+
+    def datasets(self):
+        """List datasets held by the server.
+
+        :return: dict of dataset name to shape.
+        """
+        return self._request({"op": "datasets"})["datasets"]
+
+    def stats(self):
+        """Get the server's result cache statistics.
+
+        :return: dict
+        """
+        return self._request({"op": "stats"})["stats"]
+
+    def batch(self):
+        """Collect calls made inside a `with` block and send them as one request.
+
+        Calls inside the block return Pending placeholders, filled in when the block exits.
+
+        :return: context manager.
+        """
+        return _Batch(self)
+
+    def call(self, method, *args, **kwargs):
+        """Run one request on the server, or queue it if a batch is open.
+
+        :param method: str, request name.
+        :return: Result, or Pending inside a batch.
+        """
+        if self._batch is not None:
+            return self._batch.add(method, args, kwargs)
+        return self.call_many([(method, args, kwargs)])[0]
+
+    def call_many(self, requests):
+        """Run several requests in one round trip. The server computes them concurrently.
+
+        :param requests: list[tuple(str, tuple, dict)]
+        :raise Exception: Re-raises the first error raised on the server.
+        :return: list of results, in request order.
+        """
+        results = []
+        for ok, value in self._call_raw(requests):
+            if not ok:
+                raise value
+            results.append(value)
+        return results
+
+    ###################
+    # Request Methods #
+    ###################
+
+    def find_in(self, df, find, mode=analyser.QueryMode.ANY, axis=1):
+        return self.call("find_in", df, find, mode, axis)
+
+    def find_intersection(self, *args):
+        return self.call("find_intersection", *args)
+
+    def agg(self, df, target, fns):
+        return self.call("agg", df, target, protocol.encode_fns(fns))
+
+    def describe_numeric(self, df, target=1, fns=None):
+        return self.call("describe_numeric", df, target, protocol.encode_fns(fns))
+
+    def resolve_countries(self, search=None, dataset="countries"):
+        return self.call("resolve_countries", search, dataset)
+
+    ###################
+    # Private Methods #
+    ###################
+
+    def _call_raw(self, requests):
+        """Run several requests in one round trip, without raising their errors.
+
+        :return: list[tuple(bool, object)] of (succeeded, result or exception).
+        """
+        return self._request({"op": "call", "requests": requests})["results"]
+
+    def _request(self, message):
+        """Send one message and wait for its response.
+
+        :raise Exception: Re-raises errors reported by the server.
+        :return: dict response.
+        """
+        with self._lock:
+            protocol.send(self._stream, message)
+            response = protocol.receive(self._stream)
+        if response is None:
+            raise ConnectionError("Query server closed the connection.")
+        if not response.get("ok"):
+            raise response["error"]
+        return response
+
+
+class Pending:
+    """
+    Placeholder for the result of a call queued in a batch.
+    """
+
+    def __init__(self):
+        self._done = False
+        self._ok = False
+        self._value = None
+
+    def result(self):
+        """Get the result once the batch has been sent.
+
+        :raise RuntimeError: Raises RuntimeError if the batch has not been sent yet.
+        :raise Exception: Re-raises the error raised on the server for this call.
+        :return: Result of the call.
+        """
+        if not self._done:
+            raise RuntimeError("Batch has not been sent yet.")
+        if not self._ok:
+            raise self._value
+        return self._value
+
+
+class _Batch:
+    """Context manager that queues calls and sends them in one round trip."""
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = []
+        self.pending = []
+
+    def add(self, method, args, kwargs):
+        placeholder = Pending()
+        self.requests.append((method, args, kwargs))
+        self.pending.append(placeholder)
+        return placeholder
+
+    def __enter__(self):
+        self.client._batch = self
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.client._batch = None
+        if exc_type is None and self.requests:
+            for placeholder, (ok, value) in zip(self.pending, self.client._call_raw(self.requests)):
+                placeholder._ok = ok
+                placeholder._value = value
+                placeholder._done = True
+        return False
+
+
+########################
+# Module-level Mirrors #
+########################
+
+def connect(address=protocol.DEFAULT_ADDRESS, authkey=None):
+    """Connect the module-level functions to a query server.
+
+    :param address: str Unix socket path, or tuple(host, port), defaults to protocol.DEFAULT_ADDRESS
+    :param authkey: bytes, shared key. Read from protocol.DEFAULT_AUTHKEY_PATH if None, defaults to None
+    :return: Client
+    """
+    global _default
+    _default = Client(address, authkey)
+    return _default
+
+
+def frame(name):
+    """Reference a dataset held by the server. See Client.frame."""
+    return RemoteFrame(name)
+
+
+def _remote(*args):
+    """Check if any argument references server-side data."""
+    return any(isinstance(arg, (RemoteFrame, RemoteColumn)) for arg in args)
+
+
+def _client():
+    """Get the connected default client, connecting to the default address if needed."""
+    if _default is None:
+        connect()
+    return _default
+
+
+def find_in(df, find, mode=analyser.QueryMode.ANY, axis=1):
+    """Mirror of analyser.find_in. Runs on the server if df is a RemoteFrame, locally otherwise."""
+    if _remote(df):
+        return _client().find_in(df, find, mode, axis)
+    return analyser.find_in(df, find, mode, axis)
+
+
+def find_intersection(*args):
+    """Mirror of analyser.find_intersection. Runs on the server if any argument is a RemoteColumn."""
+    if _remote(*args):
+        return _client().find_intersection(*args)
+    return analyser.find_intersection(*args)
+
+
+def agg(df, target, fns):
+    """Mirror of analyser.agg. Runs on the server if df is a RemoteFrame, locally otherwise."""
+    if _remote(df):
+        return _client().agg(df, target, fns)
+    return analyser.agg(df, target, fns)
+
+
+def describe_numeric(df, target=1, fns=None):
+    """Mirror of analyser.describe_numeric. Runs on the server if df is a RemoteFrame, locally otherwise."""
+    if _remote(df):
+        return _client().describe_numeric(df, target, fns)
+    if fns is None:
+        return analyser.describe_numeric(df, target)
+    return analyser.describe_numeric(df, target, fns)
+
+
+def resolve_countries(search=None, dataset="countries"):
+    """Resolve search terms to Country objects using the server's country codes."""
+    return _client().resolve_countries(search, dataset)
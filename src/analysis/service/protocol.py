@@ -0,0 +1,330 @@
+# protocol.py - Contains the wire format shared by the query server and client.
+
+# Import standard libraries.
+import hashlib
+import hmac
+import os
+import pickle
+import socket
+import stat
+import struct
+import tempfile
+
+
+def _runtime_dir():
+    """Find the per-user directory holding the server socket and key.
+
+    :return: str path. It is not created here.
+    """
+    if os.name == "nt":
+        return os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "analysis")
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "analysis")
+    return os.path.join(tempfile.gettempdir(), f"analysis-{os.getuid()}")
+
+
+# Per-user directory holding the server socket and key.
+RUNTIME_DIR = _runtime_dir()
+
+# File holding the key shared by the server and its clients.
+DEFAULT_AUTHKEY_PATH = os.path.join(RUNTIME_DIR, "authkey")
+
+# Default address: a Unix socket where supported, otherwise a localhost TCP port.
+if hasattr(socket, "AF_UNIX"):
+    DEFAULT_ADDRESS = os.path.join(RUNTIME_DIR, "analysis.sock")
+else:
+    DEFAULT_ADDRESS = ("127.0.0.1", 8765)
+
+# Messages are prefixed with their length as an unsigned 64-bit big-endian integer.
+_HEADER = struct.Struct(">Q")
+
+# Length of authentication keys and challenges, in bytes.
+_KEY_SIZE = 32
+
+# Largest message accepted before a connection is authenticated.
+_HANDSHAKE_MAX_BYTES = 1024
+
+# Messages sent at the end of the handshake.
+_WELCOME = b"#WELCOME#"
+_FAILURE = b"#FAILURE#"
+
+
+class AuthenticationError(ConnectionError):
+    """Raised when the other end of a connection does not hold the shared key."""
+
+# Qualified names of the analyser aggregate closures, mapped to the factories that create them.
+_AGGREGATE_FACTORIES = {
+    "percentile.<locals>._percentile": "percentile",
+    "IQR.<locals>._IQR": "IQR",
+    "spread.<locals>._spread": "spread",
+    "mode.<locals>._mode": "mode",
+}
+
+
+class RemoteFrame:
+    """
+    Reference to a dataset held by the query server, optionally grouped.
+    """
+
+    def __init__(self, name, by=None):
+        """Initialize instance of RemoteFrame.
+
+        :param name: str, name of the dataset on the server.
+        :param by: str or list[str], columns to group by on the server, defaults to None
+        """
+        self.name = name
+        self.by = by
+
+    def groupby(self, by):
+        """Reference this dataset grouped by the given columns, like pd.DataFrame.groupby.
+
+        :param by: str or list[str], columns to group by.
+        :return: RemoteFrame
+        """
+        return RemoteFrame(self.name, by)
+
+    def __getitem__(self, column):
+        """Reference a column of this dataset.
+
+        :param column: str, column name.
+        :return: RemoteColumn
+        """
+        return RemoteColumn(self.name, column)
+
+    def __repr__(self):
+        return f'RemoteFrame(name={self.name}, by={self.by})'
+
+
+class RemoteColumn:
+    """
+    Reference to a column of a dataset held by the query server.
+    """
+
+    def __init__(self, name, column):
+        """Initialize instance of RemoteColumn.
+
+        :param name: str, name of the dataset on the server.
+        :param column: str, column name.
+        """
+        self.name = name
+        self.column = column
+
+    def __repr__(self):
+        return f'RemoteColumn(name={self.name}, column={self.column})'
+
+
+def encode_fns(fns):
+    """Replace analyser aggregate closures with picklable (factory, arguments, name) specs.
+
+    The factory arguments are read from the closure itself (eg. the exact quantile of a
+    percentile), so the server rebuilds the same function rather than one matching its name.
+
+    :param fns: list[str or fn], aggregate functions, or None.
+    :raise ValueError: Raises ValueError if a function is not one of the analyser aggregate closures.
+    :return: list[str or tuple], or None.
+    """
+    if fns is None:
+        return None
+
+    specs = []
+    for fn in fns:
+        if isinstance(fn, str):
+            specs.append(fn)
+            continue
+
+        name = getattr(fn, "__name__", None)
+        factory = _AGGREGATE_FACTORIES.get(getattr(fn, "__qualname__", None))
+        if factory is None or not getattr(fn, "__module__", "").endswith(".analyser"):
+            raise ValueError(f"Cannot send aggregate function '{name}' to the query server.")
+        cells = [cell.cell_contents for cell in fn.__closure__ or ()]
+        specs.append((factory, dict(zip(fn.__code__.co_freevars, cells)), name))
+    return specs
+
+
+def decode_fns(specs, factories):
+    """Rebuild aggregate closures from specs created by encode_fns.
+
+    :param specs: list[str or tuple], or None.
+    :param factories: module providing the aggregate factories (analyser).
+    :return: list[str or fn], or None.
+    """
+    if specs is None:
+        return None
+
+    fns = []
+    for spec in specs:
+        if isinstance(spec, str):
+            fns.append(spec)
+            continue
+        factory, arguments, name = spec
+        fn = getattr(factories, factory)(**arguments)
+        fn.__name__ = name
+        fns.append(fn)
+    return fns
+
+
+def connect(address):
+    """Open a stream socket to a Unix socket path or a (host, port) tuple.
+
+    :param address: str path or tuple(host, port).
+    :return: socket.socket
+    """
+    if isinstance(address, (str, os.PathLike)):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def send(stream, obj):
+    """Write one pickled, length-prefixed message. Only use on authenticated streams.
+
+    :param stream: writable binary file object.
+    :param obj: Message to send.
+    """
+    send_bytes(stream, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def receive(stream):
+    """Read one pickled, length-prefixed message. Only use on authenticated streams.
+
+    :param stream: readable binary file object.
+    :return: Message, or None if the stream closed.
+    """
+    payload = receive_bytes(stream)
+    if payload is None:
+        return None
+    return pickle.loads(payload)
+
+
+def send_bytes(stream, payload):
+    """Write one length-prefixed message of raw bytes.
+
+    :param stream: writable binary file object.
+    :param payload: bytes to send.
+    """
+    stream.write(_HEADER.pack(len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+
+def receive_bytes(stream, max_size=None):
+    """Read one length-prefixed message of raw bytes.
+
+    :param stream: readable binary file object.
+    :param max_size: int, largest message accepted. Unlimited if None, defaults to None
+    :raise AuthenticationError: Raises AuthenticationError if the message is larger than max_size.
+    :return: bytes, or None if the stream closed.
+    """
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if max_size is not None and size > max_size:
+        raise AuthenticationError("Unexpected message before the connection was authenticated.")
+    payload = stream.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+
+##################
+# Authentication #
+##################
+
+def deliver_challenge(rfile, wfile, authkey):
+    """Authenticate a client, then prove the key to it. Called by the server on each new connection.
+
+    Both ends prove they hold the key (HMAC-SHA256 of a random challenge) before anything is
+    unpickled, like multiprocessing.connection's authkey handshake.
+
+    :param rfile: readable binary file object.
+    :param wfile: writable binary file object.
+    :param authkey: bytes, shared key.
+    :raise AuthenticationError: Raises AuthenticationError if the client does not hold the key.
+    """
+    challenge = os.urandom(_KEY_SIZE)
+    send_bytes(wfile, challenge)
+    response = receive_bytes(rfile, _HANDSHAKE_MAX_BYTES) or b""
+    digest, theirs = response[:-_KEY_SIZE], response[-_KEY_SIZE:]
+    if len(response) <= _KEY_SIZE or not hmac.compare_digest(digest, _digest(authkey, b"client", challenge)):
+        send_bytes(wfile, _FAILURE)
+        raise AuthenticationError("Client did not provide the query server key.")
+    send_bytes(wfile, _WELCOME + _digest(authkey, b"server", theirs))
+
+
+def answer_challenge(rfile, wfile, authkey):
+    """Prove the key to a server, then authenticate it. Called by the client after connecting.
+
+    :param rfile: readable binary file object.
+    :param wfile: writable binary file object.
+    :param authkey: bytes, shared key.
+    :raise AuthenticationError: Raises AuthenticationError if either end does not hold the key.
+    """
+    challenge = receive_bytes(rfile, _HANDSHAKE_MAX_BYTES)
+    if not challenge:
+        raise AuthenticationError("Query server closed the connection during authentication.")
+    ours = os.urandom(_KEY_SIZE)
+    send_bytes(wfile, _digest(authkey, b"client", challenge) + ours)
+    response = receive_bytes(rfile, _HANDSHAKE_MAX_BYTES) or b""
+    if not response.startswith(_WELCOME):
+        raise AuthenticationError("Query server rejected the key. Check it matches the server's key file.")
+    if not hmac.compare_digest(response[len(_WELCOME):], _digest(authkey, b"server", ours)):
+        raise AuthenticationError("Query server did not prove it holds the key.")
+
+
+def _digest(authkey, role, challenge):
+    """Sign a challenge for one end of the handshake, so responses cannot be reflected back."""
+    return hmac.new(authkey, role + challenge, hashlib.sha256).digest()
+
+
+def create_authkey(path=DEFAULT_AUTHKEY_PATH):
+    """Generate a new random key and write it to a file readable by the current user only.
+
+    :param path: str, key file path, defaults to DEFAULT_AUTHKEY_PATH
+    :return: bytes, the key.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    check_private(directory)
+
+    authkey = os.urandom(_KEY_SIZE)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    os.replace(temporary, path)
+    return authkey
+
+
+def read_authkey(path=DEFAULT_AUTHKEY_PATH):
+    """Read the key written by a running query server.
+
+    :param path: str, key file path, defaults to DEFAULT_AUTHKEY_PATH
+    :raise ConnectionError: Raises ConnectionError if no key file exists.
+    :raise PermissionError: Raises PermissionError if the key file or its directory is not private.
+    :return: bytes, the key.
+    """
+    check_private(os.path.dirname(os.path.abspath(path)))
+    check_private(path)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        raise ConnectionError(f"No query server key at '{path}'. Start the server first.") from None
+
+
+def check_private(path):
+    """Check that a file or directory is owned by the current user and closed to other users.
+
+    Windows paths are under the user profile and are not checked.
+
+    :param path: str path.
+    :raise PermissionError: Raises PermissionError if the path is a symlink, owned by another user, or open to other users.
+    """
+    if os.name == "nt" or not os.path.lexists(path):
+        return
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"'{path}' must be owned by the current user and not accessible to others.")
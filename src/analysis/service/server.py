@@ -0,0 +1,327 @@
+# server.py - Long-running local query server that keeps datasets loaded in memory.
+
+# Import project custom modules and Classes.
+from ..analyser import analyser
+from ..analyser import cache
+from ..analyser.country import Country
+from ..utils import parser
+from . import protocol
+from . import add_arguments
+from ..utils.lazy import lazy_import
+
+# Import standard libraries.
+import argparse
+import os
+import pickle
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Import third-party libraries lazily, so they load on first use.
+pd = lazy_import("pandas")
+
+# Column names the notebook assigns to the terrorism database.
+GTD_COLUMNS = ['Event ID', 'Country ID', 'Country', 'Year', 'Success', 'Attack Type ID', 'Attack Type', 'Killed', 'Wounded']
+
+# Datasets loaded by default, as (path relative to the data directory, parser function, keyword arguments).
+# They are parsed the same way as in the notebook, so notebook code can switch to the server's copies.
+DEFAULT_DATASETS = {
+    "countries": ("country_codes.tsv", parser.read_tsv, {}),
+    "mortality": ("mfi/mortality/mortality_long.tsv", parser.read_mfi, {"title": "Mortality Rate", "countries": None}),
+    "fertility": ("mfi/fertility/fertility_long.tsv", parser.read_mfi, {"title": "Fertility Rate", "countries": None}),
+    "income": ("mfi/income/income_long.tsv", parser.read_mfi, {"title": "Income", "countries": None}),
+    "ped": ("ped/ped.tsv", parser.read_tsv, {}),
+    "gtd": ("gtd/gtd.tsv", parser.read_tsv, {"header": 0, "names": GTD_COLUMNS}),
+}
+
+# Default number of threads computing results.
+DEFAULT_WORKERS = os.cpu_count() or 4
+
+# Seconds a new connection has to authenticate before it is dropped.
+HANDSHAKE_TIMEOUT = 10
+
+
+class QueryService:
+    """
+    Holds loaded datasets and answers analyser queries against them.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_bytes=cache.DEFAULT_MAX_BYTES):
+        """Initialize instance of QueryService.
+
+        :param workers: int, number of threads computing results, defaults to DEFAULT_WORKERS
+        :param max_bytes: int, budget of the result cache in bytes, defaults to cache.DEFAULT_MAX_BYTES
+        """
+        self.datasets = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.results = cache.ResultCache(max_bytes=max_bytes)
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+        # Queries are memoized on the content of the resolved frames. Resident datasets are
+        # fingerprinted once when loaded (see load), so lookups do not rehash them.
+        self._find_in = cache.memoize(analyser.find_in, cache=self.results)
+        self._agg = cache.memoize(analyser.agg, cache=self.results, target="target")
+        self._describe_numeric = cache.memoize(analyser.describe_numeric, cache=self.results, target="target")
+
+    ###################
+    # Service Methods #
+    ###################
+
+    def load(self, name, path, reader=parser.read_tsv, **kwargs):
+        """Parse a tsv file with utils.parser and keep it resident under a name.
+
+        :param name: str, dataset name used by clients.
+        :param path: str, path to the tsv file.
+        :param reader: function parsing the file, eg. parser.read_mfi, defaults to parser.read_tsv
+        :param **kwargs: See expected keyword arguments for the reader.
+        :return: tuple(int, int), shape of the loaded dataset.
+        """
+        df = reader(path, **kwargs)
+        cache.remember_frame(df)
+        self.datasets[name] = df
+        return df.shape
+
+    def load_defaults(self, data_dir):
+        """Load every DEFAULT_DATASETS entry that exists in the data directory.
+
+        :param data_dir: str, path to the data directory.
+        """
+        for name, (relative, reader, kwargs) in DEFAULT_DATASETS.items():
+            path = os.path.join(data_dir, relative)
+            if os.path.exists(path):
+                print(f'Loaded {name} {self.load(name, path, reader, **kwargs)} from {path}')
+            else:
+                print(f'Skipped {name}: {path} not found.')
+
+    def dispatch(self, message):
+        """Answer one client message.
+
+        :param message: dict with an 'op' key. 'call' messages hold a batch of (method, args, kwargs) requests.
+        :return: dict response.
+        """
+        op = message.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "datasets":
+            return {"ok": True, "datasets": {name: df.shape for name, df in self.datasets.items()}}
+        if op == "stats":
+            return {"ok": True, "stats": self.results.stats()}
+        if op == "call":
+            return {"ok": True, "results": self.call_batch(message["requests"])}
+        return {"ok": False, "error": ValueError(f"Unknown operation '{op}'.")}
+
+    def call_batch(self, requests):
+        """Run a batch of requests on the worker pool, sharing work between identical requests.
+
+        :param requests: list[tuple(str, tuple, dict)] of method names and arguments.
+        :return: list[tuple(bool, object)] of (succeeded, result or exception), in request order.
+        """
+        futures = []
+        for request in requests:
+            try:
+                futures.append(self._submit(*request))
+            except Exception as e:
+                futures.append(e)
+
+        results = []
+        for future in futures:
+            if isinstance(future, Exception):
+                results.append((False, future))
+                continue
+            try:
+                results.append((True, future.result()))
+            except Exception as e:
+                results.append((False, e))
+        return results
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        self.executor.shutdown(wait=True)
+
+    ###################
+    # Request Methods #
+    ###################
+
+    def find_in(self, df, find, mode=analyser.QueryMode.ANY, axis=1):
+        return self._find_in(self._resolve(df), find, mode, axis)
+
+    def find_intersection(self, *args):
+        return analyser.find_intersection(*[self._resolve(arg) for arg in args])
+
+    def agg(self, df, target, fns):
+        return self._agg(self._resolve(df), target, protocol.decode_fns(fns, analyser))
+
+    def describe_numeric(self, df, target=1, fns=None):
+        fns = protocol.decode_fns(fns, analyser)
+        if fns is None:
+            return self._describe_numeric(self._resolve(df), target)
+        return self._describe_numeric(self._resolve(df), target, fns)
+
+    def resolve_countries(self, search=None, dataset="countries"):
+        return Country.from_frame(self.datasets[dataset], search=search)
+
+    ###################
+    # Private Methods #
+    ###################
+
+    # Request names clients are allowed to call.
+    _REQUESTS = {"find_in", "find_intersection", "agg", "describe_numeric", "resolve_countries"}
+
+    def _submit(self, method, args, kwargs):
+        """Submit a request, or join an identical request that is already running.
+
+        :return: concurrent.futures.Future
+        """
+        if method not in self._REQUESTS:
+            raise ValueError(f"Unknown request '{method}'.")
+
+        key = pickle.dumps((method, args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self.executor.submit(getattr(self, method), *args, **kwargs)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _, key=key: self._finish(key))
+        return future
+
+    def _finish(self, key):
+        """Forget a completed in-flight request."""
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _resolve(self, value):
+        """Replace dataset references with the resident pandas objects.
+
+        :param value: RemoteFrame, RemoteColumn, or any other value.
+        :return: pd.DataFrame, DataFrameGroupBy, np.ndarray of unique column values, or the value itself.
+        """
+        if isinstance(value, protocol.RemoteFrame):
+            df = self.datasets[value.name]
+            if value.by is not None:
+                return df.groupby(value.by)
+            return df
+        if isinstance(value, protocol.RemoteColumn):
+            return pd.unique(self.datasets[value.name][value.column])
+        return value
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serve messages from one client connection until it disconnects."""
+
+    def handle(self):
+        # Nothing is unpickled until the client proves it holds the key.
+        self.connection.settimeout(HANDSHAKE_TIMEOUT)
+        try:
+            protocol.deliver_challenge(self.rfile, self.wfile, self.server.authkey)
+        except (OSError, protocol.AuthenticationError):
+            return
+        self.connection.settimeout(None)
+
+        while True:
+            try:
+                message = protocol.receive(self.rfile)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                break
+            if message is None:
+                break
+            try:
+                response = self.server.service.dispatch(message)
+            except Exception as e:
+                response = {"ok": False, "error": e}
+            protocol.send(self.wfile, response)
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(service, address=protocol.DEFAULT_ADDRESS, authkey=None):
+    """Create a threaded socket server for the service.
+
+    Messages are pickled, so every connection must first prove it holds the shared key (see
+    protocol.deliver_challenge). Unix sockets are also created readable by the current user only,
+    and TCP servers must be bound to localhost.
+
+    :param service: QueryService holding the datasets.
+    :param address: str Unix socket path, or tuple(host, port), defaults to protocol.DEFAULT_ADDRESS
+    :param authkey: bytes, shared key. Generates one and writes it to protocol.DEFAULT_AUTHKEY_PATH if None, defaults to None
+    :raise ValueError: Raises ValueError if a TCP address is not a loopback address.
+    :raise PermissionError: Raises PermissionError if the runtime directory is not private to the current user.
+    :return: socketserver.BaseServer
+    """
+    if not isinstance(address, (str, os.PathLike)) and address[0] not in ("127.0.0.1", "localhost", "::1"):
+        raise ValueError("Query server must only listen on localhost.")
+    if authkey is None:
+        authkey = protocol.create_authkey()
+
+    if isinstance(address, (str, os.PathLike)):
+        # The default socket lives in the per-user runtime directory, which must not be shared.
+        directory = os.path.dirname(os.path.abspath(address))
+        if directory == protocol.RUNTIME_DIR:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            protocol.check_private(directory)
+        if os.path.exists(address):
+            os.remove(address)
+        umask = os.umask(0o177)
+        try:
+            server = _UnixServer(address, _Handler)
+        finally:
+            os.umask(umask)
+    else:
+        server = _TCPServer(address, _Handler)
+    server.service = service
+    server.authkey = authkey
+    return server
+
+
+def serve(data_dir, address=protocol.DEFAULT_ADDRESS, workers=DEFAULT_WORKERS):
+    """Load the default datasets and answer queries until interrupted.
+
+    :param data_dir: str, path to the data directory.
+    :param address: str Unix socket path, or tuple(host, port), defaults to protocol.DEFAULT_ADDRESS
+    :param workers: int, number of threads computing results, defaults to DEFAULT_WORKERS
+    """
+    service = QueryService(workers=workers)
+    service.load_defaults(data_dir)
+    server = make_server(service, address)
+    print(f'Serving {len(service.datasets)} dataset(s) on {address}, key in {protocol.DEFAULT_AUTHKEY_PATH}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if isinstance(address, (str, os.PathLike)) and os.path.exists(address):
+            os.remove(address)
+
+
+def run(args):
+    """Serve with options parsed by a parser set up with service.add_arguments.
+
+    :param args: argparse.Namespace
+    """
+    workers = DEFAULT_WORKERS if args.workers is None else args.workers
+    address = protocol.DEFAULT_ADDRESS
+    if args.port is not None:
+        address = ("127.0.0.1", args.port)
+    elif args.socket is not None:
+        address = args.socket
+    serve(args.data, address, workers)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description="Serve analysis datasets from memory.")
+    add_arguments(arguments)
+    run(arguments.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
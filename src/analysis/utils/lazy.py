@@ -0,0 +1,38 @@
+# lazy.py - Deferred module imports, so lightweight modules load without pandas or NumPy.
+
+# Import standard library helpers.
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+    """
+
+    def __init__(self, name):
+        """Initialize instance of LazyModule.
+
+        :param name: str, absolute name of the module to import.
+        """
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name):
+    """Defer importing a module until one of its attributes is used.
+
+    :param name: str, absolute name of the module to import, eg. 'pandas'.
+    :return: LazyModule
+    """
+    return LazyModule(name)
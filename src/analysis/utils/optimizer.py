@@ -0,0 +1,152 @@
+# optimizer.py - Downcasts loaded frames to the smallest safe dtypes and reports memory savings.
+
+# Import project custom modules.
+from .lazy import lazy_import
+
+# Import third-party libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Largest share of unique values for which a string column is stored as a category.
+CATEGORY_RATIO = 0.5
+
+# Most significant decimal digits a float column may be written with to be stored as float32.
+FLOAT_DIGITS = 7
+
+
+def optimize(df, pin=None, category_ratio=CATEGORY_RATIO, float_digits=FLOAT_DIGITS):
+    """Convert columns to the smallest dtypes that hold their values.
+
+    Integers are downcast to the smallest signed type that fits their range (eg. int16 years),
+    repetitive strings become categories, and floats become float32 when every value keeps the
+    decimal digits it was written with (eg. 14.2 stays 14.2, while 16777217.0 stays float64).
+
+    :param df: pd.DataFrame to optimize. It is not modified.
+    :param pin: str or list[str], columns that must keep their dtype, defaults to None
+    :param category_ratio: float, largest unique/total ratio stored as a category, defaults to CATEGORY_RATIO
+    :param float_digits: int, most significant digits a value may have for float32, defaults to FLOAT_DIGITS
+    :return: Returns pd.DataFrame with optimized dtypes.
+    """
+    if isinstance(pin, str):
+        pin = [pin]
+    pinned = set(pin or [])
+
+    columns = {}
+    for column in df.columns:
+        if column in pinned:
+            continue
+        converted = _optimize_series(df[column], category_ratio, float_digits)
+        if converted is not None:
+            columns[column] = converted
+
+    # Shallow copy, so unchanged columns are shared rather than duplicated.
+    result = df.copy(deep=False)
+    for column, converted in columns.items():
+        result[column] = converted
+    return result
+
+
+def memory_report(before, after):
+    """Compare the memory footprint of a frame before and after optimization.
+
+    :param before: pd.DataFrame, original frame.
+    :param after: pd.DataFrame, optimized frame.
+    :return: Returns pd.DataFrame indexed by column (plus a 'Total' row), with dtypes, bytes and percent saved.
+    """
+    bytes_before = before.memory_usage(deep=True)
+    bytes_after = after.memory_usage(deep=True)
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+    }, index=bytes_before.index)
+    report[["dtype_before", "dtype_after"]] = report[["dtype_before", "dtype_after"]].fillna("")
+    report.loc["Total"] = ["", "", bytes_before.sum(), bytes_after.sum()]
+    report["bytes_before"] = report["bytes_before"].astype("int64")
+    report["bytes_after"] = report["bytes_after"].astype("int64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        report["saved"] = (1 - report["bytes_after"] / report["bytes_before"]).mul(100).round(1)
+    return report
+
+
+def _optimize_series(s, category_ratio, float_digits):
+    """Find the smallest safe dtype for one column.
+
+    :param s: pd.Series to convert.
+    :return: Returns converted pd.Series, or None if the dtype should not change.
+    """
+    dtype = s.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return None
+
+    # Nullable extension numerics are left as they are.
+    if pd.api.types.is_numeric_dtype(dtype) and not isinstance(dtype, np.dtype):
+        return None
+
+    if pd.api.types.is_integer_dtype(dtype):
+        converted = pd.to_numeric(s, downcast="integer")
+        return converted if converted.dtype != dtype else None
+
+    if pd.api.types.is_float_dtype(dtype):
+        if dtype.itemsize <= 4:
+            return None
+        values = s.to_numpy(dtype=np.float64)
+        if not _fits_float32(values, float_digits):
+            return None
+        return pd.Series(values.astype(np.float32), index=s.index, name=s.name)
+
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        count = s.count()
+        if count == 0 or s.nunique(dropna=True) / count > category_ratio:
+            return None
+        return s.astype("category")
+
+    return None
+
+
+def _fits_float32(values, float_digits):
+    """Check that float32 keeps every value at the precision it was written with.
+
+    Each value's precision is the fewest significant digits (up to float_digits) that reproduce
+    it exactly. Its float32 form must round back to the same value at that precision, so integral
+    values (eg. ids) must be exact.
+
+    :param values: np.ndarray of float64.
+    :param float_digits: int, most significant digits a value may have.
+    :return: bool
+    """
+    x = values[np.isfinite(values) & (values != 0)]
+    if len(x) == 0:
+        return True
+    if np.abs(x).max() > np.finfo(np.float32).max or np.abs(x).min() < np.finfo(np.float32).tiny:
+        return False
+
+    magnitude = np.floor(np.log10(np.abs(x)))
+    digits = np.zeros(len(x), dtype=np.int64)
+    for n in range(1, float_digits + 1):
+        undecided = digits == 0
+        if not undecided.any():
+            break
+        exact = _round_significant(x[undecided], magnitude[undecided], n) == x[undecided]
+        digits[np.flatnonzero(undecided)[exact]] = n
+    if (digits == 0).any():
+        return False
+
+    narrowed = x.astype(np.float32).astype(np.float64)
+    return bool(np.all(_round_significant(narrowed, magnitude, digits) == x))
+
+
+def _round_significant(x, magnitude, digits):
+    """Round values to a number of significant decimal digits.
+
+    :param x: np.ndarray of float64.
+    :param magnitude: np.ndarray, floor(log10(abs(x))) of the original values.
+    :param digits: int or np.ndarray of significant digits.
+    :return: np.ndarray of float64.
+    """
+    # Scale by an exact power of ten in the direction that keeps the rounding correct.
+    exponent = digits - 1 - magnitude
+    scale = 10.0 ** np.abs(exponent)
+    return np.where(exponent >= 0, np.round(x * scale) / scale, np.round(x / scale) * scale)
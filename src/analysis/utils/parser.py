@@ -1,23 +1,72 @@
 # parser.py - Special parser for reading and writing *.tsv files with pandas.
 
-# Import pandas library for parsing dataframes.
-import pandas as pd
+# Import project custom modules.
+from .lazy import lazy_import
+from . import optimizer
+
+# Import standard library helpers for streaming output.
+import csv
+import gzip
+import io
+import lzma
+import mmap
+import os
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+# Import pandas and NumPy libraries for parsing dataframes, lazily on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Optional dependency for zstd compressed output.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Number of rows formatted per batch when streaming output.
+DEFAULT_CHUNKSIZE = 100000
+
+# Files smaller than this are parsed on one thread, where splitting costs more than it saves.
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# Bytes checked at a time for quoted newlines before splitting a file.
+QUOTE_SCAN_BYTES = 16 * 1024 * 1024
+
+# read_csv arguments that depend on reading the file from the start, so cannot be split.
+_UNSPLITTABLE_KWARGS = {"header", "names", "skiprows", "skipfooter", "nrows", "index_col", "chunksize", "iterator", "compression", "lineterminator", "escapechar"}
+
+# Map of file extensions to compression methods.
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
 
 # For parsing MFI tables specifically.
-def read_mfi(path, title="Metric", countries=['AFG', 'JPN']):
+def read_mfi(path, title="Metric", countries=['AFG', 'JPN'], optimize=False, pin=None, workers=None):
     """Special parser for reading an MFI table.
 
     :param path: Path to the table to parse.
     :param title: fieldname to assign the value column, defaults to 'Metric'    
+    :param countries: list of country codes to keep. Keeps every country if None, defaults to ['AFG', 'JPN']
+    :param optimize: bool, downcast columns to the smallest safe dtypes, defaults to False
+    :param pin: str or list[str], columns that keep their dtype when optimizing, defaults to None
+    :param workers: int, threads parsing the file with read_tsv_parallel. Parses on one thread if None, defaults to None
     """
-    # Parse the MFI table.
-    df = read_tsv(path)
+    # Parse the MFI table. Both readers number rows in file order, so original_index is the same.
+    if workers is None:
+        df = read_tsv(path)
+    else:
+        df = read_tsv_parallel(path, workers=workers)
 
     # Rename the columns.
     df.columns = [ "Code", "Country", "Year", title ]
 
     # Select only the entries that have matching codes.
-    df = df[df["Code"].isin(countries)]
+    if countries is not None:
+        df = df[df["Code"].isin(countries)]
     
     # Add 'Time' column with DataTime type values.
     # df['Time'] = pd.to_datetime(df['Year'], format="%Y")
@@ -34,17 +83,87 @@ def read_mfi(path, title="Metric", countries=['AFG', 'JPN']):
     # Rename the index category.
     df = df.rename(columns={'index': 'original_index'})    
 
+    # Downcast after filtering, so categories only hold the selected countries.
+    if optimize:
+        df = optimizer.optimize(df, pin=pin)
+
     # Return the table.
     return df
 
-def read_tsv(filepath_or_buffer, **kwargs):
+def read_tsv(filepath_or_buffer, optimize=False, pin=None, **kwargs):
     """Read a tab-separated values (tsv) file into DataFrame.
 
     :param filepath_or_buffer: Any valid string path is acceptable. The string could be a URL.
+    :param optimize: bool, downcast columns to the smallest safe dtypes (see optimizer.optimize), defaults to False
+    :param pin: str or list[str], columns that keep their dtype when optimizing, defaults to None
     :param **kwargs: See expected keyword arguments for pandas.read_csv()
     :return: DataFrame or TextParser : Parsed file is returned as two-dimensional data structure with labeled axes.
     """
-    return pd.read_csv(filepath_or_buffer, **dict(kwargs, sep="\t"))
+    df = pd.read_csv(filepath_or_buffer, **dict(kwargs, sep="\t"))
+    if optimize and isinstance(df, pd.DataFrame):
+        df = optimizer.optimize(df, pin=pin)
+    return df
+
+
+def read_tsv_parallel(path, workers=None, optimize=False, pin=None, **kwargs):
+    """Read a large tab-separated values (tsv) file by parsing byte ranges on several threads.
+
+    The file is memory-mapped and split at newline boundaries. Files where a quoted field may
+    contain a newline are read with read_tsv, since that newline cannot be told apart from a row
+    end without reading from the start (see _has_quoted_newlines). The C parser releases the GIL, so ranges parse concurrently.
+    Pieces are concatenated in file order with a RangeIndex, matching read_tsv.
+
+    :param path: str, path to an uncompressed tsv file with a header row.
+    :param workers: int, number of threads, defaults to os.cpu_count()
+    :param optimize: bool, downcast columns to the smallest safe dtypes (see optimizer.optimize), defaults to False
+    :param pin: str or list[str], columns that keep their dtype when optimizing, defaults to None
+    :param **kwargs: See expected keyword arguments for pandas.read_csv()
+    :return: DataFrame
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+
+    # Fall back to one thread for small files and arguments that need the whole file.
+    if workers <= 1 or size < PARALLEL_MIN_BYTES or _UNSPLITTABLE_KWARGS.intersection(kwargs):
+        return read_tsv(path, optimize=optimize, pin=pin, **kwargs)
+
+    # Every column is parsed, and usecols is applied once the ranges are joined.
+    options = dict(kwargs)
+    usecols = options.pop("usecols", None)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Parse the header once, so every range uses the same column names.
+        body = mm.find(b"\n") + 1
+        if body == 0:
+            return read_tsv(path, optimize=optimize, pin=pin, **kwargs)
+        if _has_quoted_newlines(mm, body, kwargs):
+            return read_tsv(path, optimize=optimize, pin=pin, **kwargs)
+        names = list(pd.read_csv(io.BytesIO(mm[:body]), **dict(options, sep="\t", nrows=0)).columns)
+        ranges = _split_ranges(mm, body, len(mm), workers)
+
+        def parse(start, end, options):
+            return pd.read_csv(io.BytesIO(mm[start:end]), **dict(options, sep="\t", header=None, names=names))
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pieces = list(executor.map(lambda r: parse(*r, options), ranges))
+
+                # Reparse columns whose inferred type differs between ranges as strings, like a single pass would.
+                conflicts = _conflicting_columns(pieces)
+                if conflicts:
+                    dtype = dict(kwargs.get("dtype") or {}, **{c: str for c in conflicts})
+                    options = dict(options, dtype=dtype)
+                    pieces = list(executor.map(lambda r: parse(*r, options), ranges))
+        except pd.errors.ParserError:
+            # A range did not start or end on a row boundary, so read the file in one pass.
+            return read_tsv(path, optimize=optimize, pin=pin, **kwargs)
+
+    df = pd.concat(pieces, ignore_index=True)
+    if usecols is not None:
+        df = df[_select_usecols(names, usecols)]
+    if optimize:
+        df = optimizer.optimize(df, pin=pin)
+    return df
 
 
 def to_tsv(data, *args, **kwargs):
@@ -55,11 +174,218 @@ def to_tsv(data, *args, **kwargs):
     :param **kwargs: See expected keyword arguments for pandas.to_csv()
     :return: None or str : If path_or_buf is None, returns the resulting tsv format as a string. Otherwise returns None.
     """
+    return _as_frame(data).to_csv(*args, **dict(kwargs, sep="\t"))
+
+
+def write_tsv(data, path_or_buf, chunksize=DEFAULT_CHUNKSIZE, compression="infer", compresslevel=None, workers=0, encoding="utf-8", **kwargs):
+    """Stream object to a tab-separated values (tsv) file in bounded-memory batches.
+
+    :param data: Data to write as with to_tsv, or an iterator (eg. a generator) of chunks (any of those).
+    :param path_or_buf: str path or writable text buffer to write to.
+    :param chunksize: int, maximum rows formatted per batch, defaults to DEFAULT_CHUNKSIZE
+    :param compression: str, one of 'gzip', 'xz', 'zstd', None or 'infer' (from the path extension), defaults to 'infer'
+    :param compresslevel: int, compression level passed to the compressor, defaults to None
+    :param workers: int, number of threads formatting batches. 0 formats on the calling thread, defaults to 0
+    :param encoding: str, text encoding used when opening a path, defaults to 'utf-8'
+    :param **kwargs: See expected keyword arguments for pandas.to_csv()
+    :raise ValueError: Raises ValueError if the compression method is unknown or unavailable.
+    :return: int, number of rows written.
+    """
+    if chunksize is None or chunksize < 1:
+        raise ValueError("Cannot stream output with a chunksize less than 1.")
+
+    header = kwargs.pop("header", True)
+    kwargs = dict(kwargs, sep="\t")
+
+    def format_chunk(chunk, first):
+        return chunk.to_csv(None, header=header if first else False, **kwargs)
+
+    rows = 0
+    with _open_tsv(path_or_buf, compression, compresslevel, encoding) as handle:
+        chunks = enumerate(_iter_chunks(data, chunksize))
+
+        # Format and write each batch in order on the calling thread.
+        if not workers:
+            for i, chunk in chunks:
+                handle.write(format_chunk(chunk, i == 0))
+                rows += len(chunk.index)
+            return rows
+
+        # Format batches in a thread pool, keeping a bounded window of pending batches.
+        # The calling thread is the only writer, so output keeps the input order.
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, chunk in chunks:
+                pending.append((executor.submit(format_chunk, chunk, i == 0), len(chunk.index)))
+                if len(pending) >= 2 * workers:
+                    future, size = pending.popleft()
+                    handle.write(future.result())
+                    rows += size
+            while pending:
+                future, size = pending.popleft()
+                handle.write(future.result())
+                rows += size
+    return rows
+
+
+def _split_ranges(mm, start, end, count):
+    """Split a byte range into roughly equal ranges that end on newline boundaries.
+
+    :param mm: mmap.mmap or bytes to split.
+    :param start: int, first byte of the range.
+    :param end: int, end of the range (exclusive).
+    :param count: int, number of ranges to aim for.
+    :return: list[tuple(int, int)] of (start, end) byte offsets, in file order.
+    """
+    step = max((end - start) // count, 1)
+    ranges = []
+    while start < end:
+        stop = mm.find(b"\n", min(start + step, end) - 1)
+        stop = end if stop == -1 else stop + 1
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _has_quoted_newlines(mm, start, kwargs):
+    """Check if a quoted field after start may contain a newline, so the file cannot be split at newlines.
+
+    Without quoted newlines, every line holds whole quoted fields, so an even number of quote
+    characters. Lines with an odd number are counted in vectorized blocks, so quoted free text
+    without line breaks still allows splitting. Stray quotes (eg. 5'10") only cause a fallback.
+
+    :param mm: mmap.mmap or bytes of the file.
+    :param start: int, first byte after the header.
+    :param kwargs: dict, read_csv arguments.
+    :return: bool
+    """
+    if kwargs.get("quoting", csv.QUOTE_MINIMAL) == csv.QUOTE_NONE:
+        return False
+    quote = kwargs.get("quotechar", '"').encode(kwargs.get("encoding") or "utf-8")
+    if len(quote) != 1:
+        return mm.find(quote, start) != -1
+
+    # Blocks end on newlines, so no line spans two blocks.
+    blocks = max((len(mm) - start) // QUOTE_SCAN_BYTES, 1)
+    for begin, end in _split_ranges(mm, start, len(mm), blocks):
+        if mm.find(quote, begin, end) == -1:
+            continue
+        block = np.frombuffer(mm, dtype=np.uint8, count=end - begin, offset=begin)
+        quotes = np.flatnonzero(block == quote[0])
+        lines = np.searchsorted(np.flatnonzero(block == ord("\n")), quotes)
+        odd = np.bincount(lines) % 2
+        del block
+        if odd.any():
+            return True
+    return False
+
+
+def _select_usecols(names, usecols):
+    """Resolve a read_csv usecols argument to column names, kept in file order.
+
+    :param names: list[str], every column name in the file.
+    :param usecols: list of names or positions, or callable taking a name.
+    :return: list[str]
+    """
+    if callable(usecols):
+        return [name for name in names if usecols(name)]
+    wanted = set(usecols)
+    return [name for i, name in enumerate(names) if name in wanted or i in wanted]
+
+
+def _conflicting_columns(pieces):
+    """Find columns inferred as numeric in some pieces and as another type in others.
+
+    :param pieces: list[pd.DataFrame] parsed from separate ranges.
+    :return: list of column labels.
+    """
+    # Ranges without rows infer object dtypes, so they are ignored.
+    pieces = [piece for piece in pieces if len(piece.index) > 0] or pieces
+    conflicts = []
+    for column in pieces[0].columns:
+        dtypes = {piece[column].dtype for piece in pieces}
+        if len(dtypes) > 1 and not all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in dtypes):
+            conflicts.append(column)
+    return conflicts
+
+
+def _as_frame(data):
+    """Convert supported data into a pd.DataFrame, without copying existing frames.
+
+    :param data: pd.DataFrame, pd.Series, or any data accepted by the pd.DataFrame constructor.
+    :return: pd.DataFrame
+    """
     if isinstance(data, pd.DataFrame):
-        _data = data
+        return data
     elif isinstance(data, pd.Series):
-        _data = data.to_frame()
+        return data.to_frame()
+    return pd.DataFrame(data)
+
+
+def _iter_chunks(data, chunksize):
+    """Yield pd.DataFrame slices of at most chunksize rows from data.
+
+    :param data: Data accepted by _as_frame, or an iterator (eg. a generator) of chunks (any of those).
+    :param chunksize: int, maximum rows per slice.
+    :return: Generator of pd.DataFrame.
+    """
+    # Only iterators are streamed. Lists and other containers are rows of one frame, as in to_tsv.
+    if isinstance(data, Iterator):
+        sources = data
     else:
-        _data = pd.DataFrame(data)
+        sources = [data]
+
+    for source in sources:
+        frame = _as_frame(source)
+        for start in range(0, max(len(frame.index), 1), chunksize):
+            yield frame.iloc[start:start + chunksize]
+
+
+def _open_tsv(path_or_buf, compression, compresslevel, encoding):
+    """Open a text handle for streaming output, with optional compression.
+
+    :param path_or_buf: str path or writable text buffer.
+    :param compression: str, one of 'gzip', 'xz', 'zstd', None or 'infer'.
+    :param compresslevel: int, compression level, or None for the compressor default.
+    :param encoding: str, text encoding used when opening a path.
+    :raise ValueError: Raises ValueError if the compression method is unknown or unavailable.
+    :return: Writable text handle usable as a context manager.
+    """
+    # Buffers are written to directly and left open for the caller.
+    if not isinstance(path_or_buf, (str, os.PathLike)):
+        if compression not in (None, "infer"):
+            raise ValueError("Cannot compress output written to a buffer. Provide a path instead.")
+        return _UnclosedBuffer(path_or_buf)
+
+    if compression == "infer":
+        _, extension = os.path.splitext(os.fspath(path_or_buf))
+        compression = COMPRESSION_EXTENSIONS.get(extension.lower())
+
+    if compression is None:
+        return open(path_or_buf, "w", encoding=encoding, newline="")
+    elif compression == "gzip":
+        level = 9 if compresslevel is None else compresslevel
+        return gzip.open(path_or_buf, "wt", compresslevel=level, encoding=encoding, newline="")
+    elif compression == "xz":
+        return lzma.open(path_or_buf, "wt", preset=compresslevel, encoding=encoding, newline="")
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package.")
+        level = 3 if compresslevel is None else compresslevel
+        writer = zstandard.ZstdCompressor(level=level).stream_writer(open(path_or_buf, "wb"), closefd=True)
+        return io.TextIOWrapper(writer, encoding=encoding, newline="")
+
+    raise ValueError(f"Unknown compression method '{compression}'.")
+
+
+class _UnclosedBuffer:
+    """Context manager that hands back a caller-owned buffer without closing it."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __enter__(self):
+        return self.buffer
 
-    return _data.to_csv(*args, **dict(kwargs, sep="\t"))
+    def __exit__(self, *exc):
+        return False
@@ -1,8 +1,15 @@
 # validate.py - Contains validation checks.
 
+# Import project custom modules.
+from .lazy import lazy_import
+
 # Import standard library helpers.
 import unicodedata
 
+# Import third-party libraries lazily, so they load on first use.
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
 def normalize_nfkd(s):
     """Perform NFKD normalization on an input string.
 
@@ -64,5 +71,150 @@ def is_numeric(s):
     try:
         int(s)
         return True
-    except (TypeError, ValueError):
+    except (TypeError, ValueError, OverflowError):
         return False
+
+
+#####################
+# Vectorized Checks #
+#####################
+
+# Matches strings that int() would accept: digits (any script), single underscores between digits, and surrounding whitespace.
+_INTEGER_PATTERN = r"\s*[+-]?\d+(?:_\d+)*\s*"
+
+
+def _as_series(values):
+    """Wrap an array-like input as a pd.Series without copying existing Series.
+
+    :param values: pd.Series, np.ndarray, or list of values to check.
+    :return: Returns pd.Series view of the input.
+    """
+    if isinstance(values, pd.Series):
+        return values
+    return pd.Series(values)
+
+
+def _string_mask(s):
+    """Find which entries in an object pd.Series hold str values.
+
+    :param s: pd.Series to check.
+    :return: Returns boolean np.ndarray, True where the entry is a str.
+    """
+    if pd.api.types.is_string_dtype(s.dtype) and s.dtype != object:
+        return s.notna().to_numpy()
+    if s.dtype != object:
+        return np.zeros(len(s.index), dtype=bool)
+    return np.fromiter((isinstance(x, str) for x in s.array), dtype=bool, count=len(s.index))
+
+
+def is_empty_series(values):
+    """Vectorized counterpart of is_empty: check each value for being null or an empty string.
+
+    :param values: pd.Series or array-like of values to check.
+    :return: Returns boolean pd.Series, True where the value is empty.
+    """
+    s = _as_series(values)
+    empty = s.isna()
+    strings = _string_mask(s)
+    if strings.any():
+        empty = empty | (s.where(strings).str.len() == 0)
+    return empty
+
+
+def is_whitespace_series(values):
+    """Vectorized counterpart of is_whitespace: check each str value for being empty or only whitespace.
+
+    :param values: pd.Series or array-like of values to check.
+    :return: Returns boolean pd.Series, True where the value is a whitespace-only str. Non-str values are False.
+    """
+    s = _as_series(values)
+    strings = _string_mask(s)
+    if not strings.any():
+        return pd.Series(False, index=s.index)
+    stripped = s.where(strings).str.strip().str.len() == 0
+    return pd.Series(strings & stripped.fillna(False).to_numpy(dtype=bool), index=s.index)
+
+
+def is_numeric_series(values):
+    """Vectorized counterpart of is_numeric: check each value for being convertible with int().
+
+    :param values: pd.Series or array-like of values to check.
+    :return: Returns boolean pd.Series, True where the value is a numeric. False if empty or not a numeric.
+    """
+    s = _as_series(values)
+
+    # Numeric dtypes only fail on missing or infinite values.
+    if pd.api.types.is_bool_dtype(s.dtype):
+        return s.notna()
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return pd.Series(np.isfinite(s.to_numpy(dtype=float, na_value=np.nan)), index=s.index)
+
+    # Strings must look like integers. Other objects (rare) are checked one by one with is_numeric.
+    strings = _string_mask(s)
+    numeric = np.zeros(len(s.index), dtype=bool)
+    if strings.any():
+        matched = s.where(strings).str.fullmatch(_INTEGER_PATTERN)
+        numeric |= matched.fillna(False).to_numpy(dtype=bool)
+    if not strings.all():
+        others = np.flatnonzero(~strings)
+        numeric[others] = np.fromiter((is_numeric(x) for x in s.array[others]), dtype=bool, count=len(others))
+    return pd.Series(numeric, index=s.index)
+
+
+def is_coercible_series(values):
+    """Check each value for being convertible to a number by pd.to_numeric (eg. '204.8', '1e3' or '7').
+
+    :param values: pd.Series or array-like of values to check.
+    :return: Returns boolean pd.Series, True where the value converts to a number.
+    """
+    s = _as_series(values)
+    try:
+        return pd.to_numeric(s, errors="coerce").notna()
+    except TypeError:
+        # Cells such as lists cannot be coerced at all, so convert one value at a time.
+        coerced = [pd.to_numeric(x, errors="coerce") if pd.api.types.is_scalar(x) else np.nan for x in s.array]
+        return pd.Series(pd.notna(coerced), index=s.index)
+
+
+def is_normalized_series(values, form="NFKD"):
+    """Check each str value for already being in the given unicode normal form.
+
+    :param values: pd.Series or array-like of values to check.
+    :param form: str, unicode normal form to compare against, defaults to 'NFKD'
+    :return: Returns boolean pd.Series, False where a str value changes under normalization. Non-str values are True.
+    """
+    s = _as_series(values)
+    strings = _string_mask(s)
+    if not strings.any():
+        return pd.Series(True, index=s.index)
+    subset = s.where(strings)
+    changed = (subset.str.normalize(form) != subset) & strings
+    return ~changed.astype(bool)
+
+
+def validation_report(df):
+    """Summarize data quality for every column in a pd.DataFrame in a single pass.
+
+    :param df: pd.DataFrame containing the dataset to validate.
+    :return: Returns pd.DataFrame indexed by column, with dtype, count, null, numeric (coercible to a number), whitespace and non_normalized counts.
+    """
+    rows = []
+    for column in df.columns:
+        s = df[column]
+        nulls = s.isna()
+        row = {
+            "dtype": str(s.dtype),
+            "count": int(len(s.index)),
+            "null": int(nulls.sum()),
+            "numeric": int(is_coercible_series(s).sum()),
+            "whitespace": 0,
+            "non_normalized": 0,
+        }
+
+        # String checks only apply to columns that can hold str values.
+        if s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+            row["whitespace"] = int(is_whitespace_series(s).sum())
+            row["non_normalized"] = int((~is_normalized_series(s)).sum())
+        rows.append(row)
+
+    return pd.DataFrame(rows, index=pd.Index(df.columns, name="Column"))
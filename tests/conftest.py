@@ -0,0 +1,7 @@
+# conftest.py - Makes the analysis package under src/ importable from the tests.
+
+# Import standard libraries.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
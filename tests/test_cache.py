@@ -0,0 +1,63 @@
+# test_cache.py - Regression tests for the analyser result cache.
+
+# Import project custom modules.
+from analysis.analyser import analyser, cache
+
+# Import third-party libraries.
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def memoized_agg():
+    return cache.memoize(analyser.agg, cache=cache.ResultCache())
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"v": [1.0, 2.0, 3.0, 4.0, 3.0]})
+
+
+def test_lambdas_do_not_share_entries(memoized_agg, df):
+    assert memoized_agg(df, "v", [lambda x: x.sum()]).iloc[0, 0] == 13.0
+    assert memoized_agg(df, "v", [lambda x: x.max()]).iloc[0, 0] == 4.0
+
+
+def test_percentiles_with_the_same_name_do_not_share_entries(memoized_agg, df):
+    low, high = analyser.percentile(0.255), analyser.percentile(0.26)
+    assert low.__name__ == high.__name__
+
+    memoized_agg(df, "v", [low])
+    expected = analyser.agg(df, "v", [high])
+    pd.testing.assert_frame_equal(memoized_agg(df, "v", [high]), expected)
+
+
+def test_equal_closures_share_entries(memoized_agg, df):
+    memoized_agg(df, "v", [analyser.percentile(0.25), analyser.IQR()])
+    memoized_agg(df, "v", [analyser.percentile(0.25), analyser.IQR()])
+    assert memoized_agg.cache.stats()["hits"] == 1
+
+
+@pytest.fixture
+def memoized_describe():
+    return cache.memoize(analyser.describe_numeric, cache=cache.ResultCache(), target="target")
+
+
+def test_groupby_options_do_not_share_entries(memoized_describe):
+    g = pd.DataFrame({"k": ["b", None, "a", "b"], "v": [1.0, 2.0, 3.0, 4.0]})
+    for options in [{}, {"dropna": False}, {"sort": False}, {"as_index": False}]:
+        expected = analyser.describe_numeric(g.groupby("k", **options), "v", ["mean"])
+        pd.testing.assert_frame_equal(memoized_describe(g.groupby("k", **options), "v", ["mean"]), expected)
+
+
+def test_series_groupby_hashes_the_grouping_column():
+    a = pd.DataFrame({"k": [1, 1, 2], "v": [1.0, 2.0, 3.0]})
+    b = pd.DataFrame({"k": [1, 2, 2], "v": [1.0, 2.0, 3.0]})
+    assert cache.fingerprint_frame(a.groupby("k")["v"]) != cache.fingerprint_frame(b.groupby("k")["v"])
+
+
+def test_object_cells_of_different_types_do_not_share_entries(memoized_agg):
+    a = pd.DataFrame({"c": pd.Series([1, 1, "x"], dtype=object)})
+    b = pd.DataFrame({"c": pd.Series(["1", "1", "x"], dtype=object)})
+    assert memoized_agg(a, "c", [analyser.mode()]).iloc[0, 0] == 1
+    assert memoized_agg(b, "c", [analyser.mode()]).iloc[0, 0] == "1"
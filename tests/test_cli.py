@@ -0,0 +1,22 @@
+# test_cli.py - Tests for the `python -m analysis` argument parser.
+
+# Import project custom modules.
+from analysis import cli
+
+
+def test_serve_accepts_server_options():
+    args = cli.build_parser().parse_args(["serve", "--port", "1"])
+    assert args.run is cli.serve
+    assert args.port == 1
+    assert args.data == "data"
+
+
+def test_serve_options_match_server_main():
+    args = cli.build_parser().parse_args(["serve", "--data", "../data", "--socket", "s.sock", "--workers", "2"])
+    assert (args.data, args.socket, args.workers) == ("../data", "s.sock", 2)
+    assert cli.build_parser().parse_args(["serve"]).workers is None
+
+
+def test_export_options():
+    args = cli.build_parser().parse_args(["export", "in.tsv", "out.tsv.gz", "--workers", "3"])
+    assert (args.path, args.output, args.workers, args.compression) == ("in.tsv", "out.tsv.gz", 3, "infer")
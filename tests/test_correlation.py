@@ -0,0 +1,66 @@
+# test_correlation.py - Compares the vectorized correlations with pandas on panels with gaps and ties.
+
+# Import project custom modules.
+from analysis.analyser import correlation
+from analysis.analyser.correlation import Method
+
+# Import third-party libraries.
+import numpy as np
+import pandas as pd
+import pytest
+
+INDICATORS = ["a", "b", "x", "y"]
+
+
+@pytest.fixture
+def long_df():
+    rng = np.random.default_rng(1)
+    rows = [(code, year, *rng.normal(size=len(INDICATORS))) for code in ["AAA", "BBB", "CCC"] for year in range(1990, 2010)]
+    df = pd.DataFrame(rows, columns=["Code", "Year"] + INDICATORS)
+    for column in INDICATORS:
+        df.loc[rng.random(len(df.index)) < 0.2, column] = np.nan
+    # Ties.
+    df.loc[df.index[:6], "a"] = 1.0
+    df.loc[df.index[20:26], "b"] = 0.5
+    return df
+
+
+@pytest.mark.parametrize("method", [Method.PEARSON, Method.SPEARMAN])
+def test_correlate_matches_pandas(long_df, method):
+    panel = correlation.build_panel(long_df)
+    result = correlation.correlate(panel, method)
+    expected = long_df[INDICATORS].corr(method.name.lower(), min_periods=3)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-12)
+
+
+@pytest.mark.parametrize("method", [Method.PEARSON, Method.SPEARMAN])
+def test_correlate_by_country_matches_groupby_corr(long_df, method):
+    panel = correlation.build_panel(long_df)
+    result = correlation.correlate_by_country(panel, method)
+    expected = long_df.groupby("Code")[INDICATORS].corr(method.name.lower(), min_periods=3)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-12)
+
+
+@pytest.mark.parametrize("method", [Method.PEARSON, Method.SPEARMAN])
+def test_lagged_correlation_matches_shift(long_df, method):
+    lags = [-2, 0, 1, 3]
+    panel = correlation.build_panel(long_df)
+    result = correlation.lagged_correlation(panel, "a", "b", lags=lags, method=method)
+
+    for code, group in long_df.groupby("Code"):
+        group = group.set_index("Year")
+        for lag in lags:
+            pair = pd.DataFrame({"x": group["a"], "y": group["b"].shift(-lag)})
+            expected = pair.corr(method.name.lower(), min_periods=3).loc["x", "y"]
+            assert result.loc[code, lag] == pytest.approx(expected, abs=1e-12, nan_ok=True)
+
+
+def test_event_counts_fill_years_without_events():
+    countries_df = pd.DataFrame({"ID": [4, 5], "Code": ["AFG", "ALB"], "Country": ["Afghanistan", "Albania"]})
+    gtd_df = pd.DataFrame({"Country ID": [4, 4, 5, 999], "Year": [1970, 1970, 1972, 1970]})
+
+    counts = correlation.event_counts(gtd_df, countries_df, years=[1970, 1971, 1972])
+    assert counts.set_index(["Code", "Year"])["Incidents"].to_dict() == {
+        ("AFG", 1970): 2, ("AFG", 1971): 0, ("AFG", 1972): 0,
+        ("ALB", 1970): 0, ("ALB", 1971): 0, ("ALB", 1972): 1,
+    }
@@ -0,0 +1,91 @@
+# test_country.py - Tests for Country equality, ordering and set helpers.
+
+# Import project custom modules.
+from analysis.analyser.country import Country, IDType
+
+# Import standard libraries.
+import itertools
+import random
+
+# Import third-party libraries.
+import pytest
+
+
+@pytest.fixture
+def countries():
+    return [
+        Country(4, "AFG", "Afghanistan"),
+        Country(101, "JPN", "Japan"),
+        Country(None, "USA", "United States"),
+        Country(60, None, "Egypt"),
+        Country(None, None, "Nowhere"),
+        Country(60, "EGY", "Egypt"),
+        Country(None, "ALB", "Albania"),
+    ]
+
+
+def test_equality_normalizes_ids():
+    assert Country("4", "AFG") == Country(4, "AFG") == Country(4.0, "AFG")
+    assert Country(4, "AFG", "Afghanistan") == Country(4, "AFG", "Other label")
+    assert Country(4, "AFG") != Country(5, "AFG")
+    assert Country(4, "AFG") != Country(4, "ALB")
+
+
+def test_non_integral_ids_are_not_truncated():
+    assert Country(4.7, "AFG") != Country(4, "AFG")
+    assert Country(4, "AFG") < Country(4.7, "AFG") < Country(5, "AFG")
+
+
+def test_hash_matches_equality():
+    assert hash(Country("4", "AFG")) == hash(Country(4, "AFG"))
+    assert len({Country("4", "AFG"), Country(4, "AFG"), Country(4, "AFG", "Afghanistan")}) == 1
+
+
+def test_missing_identifiers_order_last():
+    assert Country(4, "AFG") < Country(None, "AFG")
+    assert Country(60, "EGY") < Country(60, None)
+    assert not Country(None, "AFG") < Country(4, "AFG")
+
+
+def test_sort_matches_sorted(countries):
+    rng = random.Random(0)
+    for _ in range(20):
+        rng.shuffle(countries)
+        assert Country.sort(countries) == sorted(countries)
+        assert [c.label for c in Country.sort(countries)] == [c.label for c in sorted(countries)]
+
+
+def test_sort_by_code_and_reverse(countries):
+    codes = [c.code for c in Country.sort(countries, by=IDType.CODE)]
+    assert codes == ["AFG", "ALB", "EGY", "JPN", "USA", None, None]
+
+    ids = [c.id_ for c in Country.sort(countries, reverse=True)]
+    assert ids[:4] == [101, 60, 60, 4]
+    assert ids[4:] == [None, None, None]
+
+
+def test_unique_keeps_first_occurrence():
+    first, second = Country(4, "AFG", "Afghanistan"), Country("4", "AFG", "Other")
+    result = Country.unique([first, Country(101, "JPN"), second])
+    assert len(result) == 2
+    assert result[0] is first
+
+
+def test_set_helpers(countries):
+    a = countries[:4]
+    b = [Country("101", "JPN", "Nippon"), Country(4, "AFG"), Country(7, "XYZ")]
+
+    assert Country.union(a, b) == sorted(Country.unique(a + b))
+    intersection = Country.intersection(a, b)
+    assert intersection == [Country(4, "AFG"), Country(101, "JPN")]
+    # Instances come from the first collection.
+    assert [c.label for c in intersection] == ["Afghanistan", "Japan"]
+    assert Country.difference(a, b) == sorted([Country(None, "USA"), Country(60, None)])
+    assert Country.intersection() == []
+
+
+@pytest.mark.parametrize("pair", list(itertools.combinations(range(7), 2)))
+def test_total_ordering_is_consistent(countries, pair):
+    x, y = countries[pair[0]], countries[pair[1]]
+    assert (x < y) + (x == y) + (x > y) == 1
+    assert (x <= y) == (x < y or x == y)
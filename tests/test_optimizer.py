@@ -0,0 +1,54 @@
+# test_optimizer.py - Tests that dtype downcasting never changes values as written.
+
+# Import project custom modules.
+from analysis.utils import optimizer
+
+# Import third-party libraries.
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("values", [
+    [201712310032.0, 201712310033.0, np.nan],
+    [16777217.0, 1.0],
+    [0.12345678, 2.5],
+    [1 / 3, 0.5],
+    [1e-40, 1.0],
+])
+def test_id_like_and_wide_floats_stay_float64(values):
+    df = pd.DataFrame({"x": values})
+    result = optimizer.optimize(df)
+    assert result["x"].dtype == np.float64
+    pd.testing.assert_series_equal(result["x"], df["x"])
+
+
+def test_short_decimals_become_float32_and_print_as_written():
+    values = [14.2, 204.8, 3.75, 0.1234567, np.nan, 0.0, -2.5e30]
+    result = optimizer.optimize(pd.DataFrame({"x": values}))
+    assert result["x"].dtype == np.float32
+    written = [float(str(v)) for v in result["x"].to_numpy()]
+    np.testing.assert_array_equal(written, values)
+
+
+def test_integral_floats_within_float32_precision_become_float32():
+    result = optimizer.optimize(pd.DataFrame({"year": [1970.0, 2017.0, np.nan]}))
+    assert result["year"].dtype == np.float32
+    assert result["year"].iloc[1] == 2017
+
+
+def test_pinned_columns_keep_their_dtype():
+    df = pd.DataFrame({"rate": [14.2, 3.75], "year": [1970, 2017], "code": ["AFG", "AFG"]})
+    result = optimizer.optimize(df, pin=["rate", "year"])
+    assert result["rate"].dtype == np.float64
+    assert result["year"].dtype == np.int64
+    assert isinstance(result["code"].dtype, pd.CategoricalDtype)
+
+    assert optimizer.optimize(df, pin="rate")["year"].dtype == np.int16
+
+
+def test_input_is_not_modified():
+    df = pd.DataFrame({"rate": [14.2, 3.75], "year": [1970, 2017]})
+    dtypes = df.dtypes.copy()
+    optimizer.optimize(df)
+    pd.testing.assert_series_equal(df.dtypes, dtypes)
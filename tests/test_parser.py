@@ -0,0 +1,116 @@
+# test_parser.py - Checks that the parallel reader returns exactly what read_tsv returns.
+
+# Import project custom modules.
+from analysis.utils import parser
+
+# Import standard libraries.
+import csv
+import os
+
+# Import third-party libraries.
+import numpy as np
+import pandas as pd
+import pytest
+
+# Data directory shipped with the repository.
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+@pytest.fixture(autouse=True)
+def split_small_files(monkeypatch):
+    monkeypatch.setattr(parser, "PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(parser, "QUOTE_SCAN_BYTES", 4096)
+
+
+@pytest.fixture
+def single_pass(monkeypatch):
+    """Record calls where read_tsv_parallel falls back to read_tsv."""
+    calls = []
+    read_tsv = parser.read_tsv
+
+    def _read_tsv(*args, **kwargs):
+        calls.append(args)
+        return read_tsv(*args, **kwargs)
+
+    monkeypatch.setattr(parser, "read_tsv", _read_tsv)
+    return calls
+
+
+@pytest.fixture
+def events(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 20000
+    df = pd.DataFrame({
+        "eventid": np.arange(n),
+        "iyear": rng.integers(1970, 2017, n),
+        "country": rng.choice(["Iraq", "Peru", "Nepal"], n),
+        "nkill": np.where(rng.random(n) < 0.1, np.nan, rng.integers(0, 50, n)),
+        "summary": rng.choice(["plain", 'said "no"', "tab\\there", ""], n),
+    })
+    path = tmp_path / "events.tsv"
+    df.to_csv(path, sep="\t", index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [2, 3, 7])
+def test_matches_read_tsv(events, workers, single_pass):
+    result = parser.read_tsv_parallel(events, workers=workers)
+    assert single_pass == []
+    pd.testing.assert_frame_equal(result, pd.read_csv(events, sep="\t"))
+
+
+@pytest.mark.parametrize("usecols", [["country", "iyear"], [1, 3], lambda c: c != "eventid"])
+def test_usecols_matches_read_tsv(events, usecols):
+    result = parser.read_tsv_parallel(events, workers=4, usecols=usecols)
+    pd.testing.assert_frame_equal(result, parser.read_tsv(events, usecols=usecols))
+
+
+def test_dtype_conflicts_are_reparsed_like_one_pass(tmp_path, single_pass):
+    # 'value' is numeric in the first half of the file and text in the second.
+    path = tmp_path / "mixed.tsv"
+    rows = [f"{i}\t{i * 1.5}" for i in range(5000)] + [f"{i}\tn/a-{i}" for i in range(5000, 10000)]
+    path.write_text("id\tvalue\n" + "\n".join(rows) + "\n")
+
+    result = parser.read_tsv_parallel(str(path), workers=4)
+    assert single_pass == []
+    expected = parser.read_tsv(str(path))
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["value"].iloc[0] == "0.0"
+
+
+def test_quoted_newlines_fall_back_to_read_tsv(tmp_path, single_pass):
+    path = tmp_path / "quoted.tsv"
+    df = pd.DataFrame({"id": range(3000), "summary": ["two\nlines" if i % 500 == 0 else "one line" for i in range(3000)]})
+    df.to_csv(path, sep="\t", index=False)
+
+    for workers in [2, 3, 5]:
+        pd.testing.assert_frame_equal(parser.read_tsv_parallel(str(path), workers=workers), df)
+    assert len(single_pass) == 3
+
+
+def test_quote_none_splits_despite_quotes(tmp_path, single_pass):
+    path = tmp_path / "inches.tsv"
+    path.write_text("id\theight\n" + "".join(f'{i}\t"5\'{i % 12}"\n' for i in range(5000)))
+
+    result = parser.read_tsv_parallel(str(path), workers=4, quoting=csv.QUOTE_NONE)
+    assert single_pass == []
+    pd.testing.assert_frame_equal(result, parser.read_tsv(str(path), quoting=csv.QUOTE_NONE))
+
+
+def test_has_quoted_newlines():
+    def check(body):
+        return parser._has_quoted_newlines(b"h\n" + body, 2, {})
+
+    assert check(b'1\t"two\nlines"\n')
+    assert check(b'"a ""quoted"" word\nthen more"\t2\n')
+    assert not check(b'1\t"one line"\n2\t"said ""hi"""\n')
+    assert not check(b'1\tplain\n')
+    assert not check(b'')
+
+
+def test_read_mfi_workers_matches_single_pass():
+    path = os.path.join(DATA, "mfi", "mortality", "mortality_long.tsv")
+    expected = parser.read_mfi(path, "Mortality Rate", countries=["JPN", "USA", "AFG"])
+    result = parser.read_mfi(path, "Mortality Rate", countries=["JPN", "USA", "AFG"], workers=4)
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["original_index"].is_unique
@@ -0,0 +1,51 @@
+# test_validate.py - Checks that the vectorized validation checks agree with their scalar versions.
+
+# Import project custom modules.
+from analysis.utils import validate
+
+# Import third-party libraries.
+import numpy as np
+import pandas as pd
+import pytest
+
+# Values covering the edge cases of int(), str.strip() and unicode normalization.
+VALUES = [
+    "7", " 7 ", "-7", "+7", "1_000", "1__000", "_1", "1_", "٣", "１２", "7.0", "1e3", "204.8",
+    "", " ", "\t\n", "　", "abc", "ﬁ", "é", None, np.nan, 4.7, 12, True, float("inf"), b"12",
+]
+
+
+def _scalar(check, value, default):
+    """Apply a scalar check, using default for values it does not accept (eg. None)."""
+    try:
+        return check(value)
+    except (TypeError, AttributeError):
+        return default
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_is_numeric_series_matches_is_numeric(value):
+    s = pd.Series([value], dtype=object)
+    assert validate.is_numeric_series(s).iloc[0] == validate.is_numeric(value)
+
+
+@pytest.mark.parametrize("value", [v for v in VALUES if isinstance(v, str)])
+def test_string_checks_match_scalar_versions(value):
+    s = pd.Series([value], dtype=object)
+    assert validate.is_empty_series(s).iloc[0] == validate.is_empty(value)
+    assert validate.is_whitespace_series(s).iloc[0] == validate.is_whitespace(value)
+    assert validate.is_normalized_series(s).iloc[0] == (validate.normalize_nfkd(value) == value)
+
+
+def test_numeric_dtypes():
+    s = pd.Series([1.0, np.nan, np.inf, 4.7])
+    assert validate.is_numeric_series(s).tolist() == [validate.is_numeric(v) for v in s]
+
+
+def test_report_counts_coercible_values():
+    df = pd.DataFrame({"rate": ["204.8", "1e3", "7"], "name": ["a", " ", None]})
+    report = validate.validation_report(df)
+    assert report.loc["rate", "numeric"] == 3
+    assert report.loc["name", "numeric"] == 0
+    assert report.loc["name", "null"] == 1
+    assert report.loc["name", "whitespace"] == 1